@@ -18,20 +18,63 @@ System Requirements:
 - Python 3.9+ with duckdb, orjson
 """
 
+import io
+import os
 import sys
 import time
-import json
 import argparse
+import importlib
+import traceback
+import hashlib
+import contextlib
+import orjson
+import numpy as np
 from pathlib import Path
 from typing import Dict, List, Any
 
+try:
+    import ijson  # Optional: stream large reports instead of loading them whole
+except ImportError:
+    ijson = None
+
+# Upper bound on reports/_cache size; least recently used entries are evicted first
+STAGE_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+def _walk_file_stats(path):
+    """Yield os.stat_result for every file under path via an iterative os.scandir walk."""
+    stack = [path]
+    while stack:
+        with os.scandir(stack.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                else:
+                    yield entry.stat(follow_symlinks=False)
+
+def _query_seconds(queries: List[Dict[str, Any]]) -> np.ndarray:
+    """Per-query runtimes from a runner report as a float64 array."""
+    return np.fromiter((q.get("seconds", 0) for q in queries), dtype=np.float64, count=len(queries))
+
+def _read_json(path: Path) -> Any:
+    """Parse a JSON report, or return None if it does not exist."""
+    try:
+        return orjson.loads(path.read_bytes())
+    except FileNotFoundError:
+        return None
+
+def _dir_bytes(path) -> int:
+    """Sum file sizes under path."""
+    return sum(st.st_size for st in _walk_file_stats(path))
+
 class BenchmarkRunner:
     """Complete benchmark runner for judge evaluation."""
     
-    def __init__(self, base_path: str = ".", memory_limit: str = "12GB", threads: int = 8):
+    def __init__(self, base_path: str = ".", memory_limit: str = "12GB", threads: int = 8,
+                 use_cache: bool = True):
         self.base_path = Path(base_path)
         self.memory_limit = memory_limit
         self.threads = threads
+        self.use_cache = use_cache
         self.results = {}
         
         # Paths
@@ -40,6 +83,91 @@ class BenchmarkRunner:
         self.lake_path = self.data_path / "lake"
         self.mvs_path = self.data_path / "mvs_rebuilt" 
         self.reports_path = self.base_path / "reports"
+        self.cache_path = self.reports_path / "_cache"
+        
+    def _input_fingerprint(self) -> str:
+        """Latest mtime across lake and MV files; changes whenever either is rebuilt."""
+        latest = 0.0
+        for root in (self.lake_path, self.mvs_path):
+            if root.exists():
+                latest = max((st.st_mtime for st in _walk_file_stats(root)), default=latest)
+        return repr(latest)
+        
+    def _source_fingerprint(self) -> str:
+        """Digest of the query files and runner sources a stage executes."""
+        digest = hashlib.blake2b(digest_size=16)
+        for root in (self.data_path / "queries", self.src_path):
+            if not root.exists():
+                continue
+            for path in sorted(root.rglob("*")):
+                if path.is_file() and path.suffix in (".json", ".py"):
+                    digest.update(str(path.relative_to(root)).encode())
+                    digest.update(path.read_bytes())
+        return digest.hexdigest()
+        
+    def _cached_stage(self, stage: str, run, artifacts: List[Path]) -> Dict[str, Any]:
+        """Serve a demo stage from reports/_cache when its inputs are unchanged.
+        
+        ``artifacts`` are the report files the stage writes; a cached result is only
+        replayed while they all still exist, otherwise the stage reruns to regenerate them.
+        """
+        if not self.use_cache:
+            return run()
+            
+        key_source = (f"{stage}|{self.memory_limit}|{self.threads}|{self._input_fingerprint()}"
+                      f"|{self._source_fingerprint()}")
+        cache_file = self.cache_path / f"{stage}_{hashlib.blake2b(key_source.encode(), digest_size=16).hexdigest()}.json"
+        if all(path.exists() for path in artifacts):
+            try:
+                cached = orjson.loads(cache_file.read_bytes())
+                os.utime(cache_file)  # Mark as recently used
+                print(f"   ♻️  Reusing cached {stage} (inputs unchanged)")
+                return cached
+            except FileNotFoundError:
+                pass
+            
+        result = run()
+        if any(value is False for key, value in result.items() if key.endswith("_success")):
+            return result  # Never replay a failed stage
+        self.cache_path.mkdir(parents=True, exist_ok=True)
+        cache_file.write_bytes(orjson.dumps(result))
+        self._evict_cache()
+        return result
+        
+    def _evict_cache(self):
+        """Drop least recently used cache entries beyond STAGE_CACHE_MAX_BYTES."""
+        entries = sorted(
+            ((entry.stat().st_mtime, entry.stat().st_size, entry.path) for entry in os.scandir(self.cache_path)),
+            reverse=True
+        )
+        total = 0
+        for _, size, path in entries:
+            total += size
+            if total > STAGE_CACHE_MAX_BYTES:
+                os.unlink(path)
+                
+    def _run_in_process(self, module_name: str, argv: List[str]) -> Dict[str, Any]:
+        """Invoke a src/ module's CLI main() in this interpreter, capturing its output."""
+        if str(self.src_path) not in sys.path:
+            sys.path.insert(0, str(self.src_path))
+        module = importlib.import_module(module_name)
+        
+        stdout, stderr = io.StringIO(), io.StringIO()
+        saved_argv = sys.argv
+        sys.argv = [module_name + ".py"] + argv
+        try:
+            with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+                try:
+                    returncode = module.main() or 0
+                except SystemExit as e:
+                    returncode = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+                except Exception:
+                    traceback.print_exc()
+                    returncode = 1
+        finally:
+            sys.argv = saved_argv
+            
+        return {"returncode": returncode, "stdout": stdout.getvalue(), "stderr": stderr.getvalue()}
         
     def check_system_requirements(self) -> Dict[str, Any]:
         """Verify system meets requirements."""
@@ -98,11 +226,8 @@ class BenchmarkRunner:
         # Run queries with our optimized runner
         start_time = time.perf_counter()
         
-        import subprocess
-        
         # Use the optimized runner with telemetry
-        cmd = [
-            sys.executable, str(self.src_path / "runner.py"),
+        argv = [
             "--lake", str(self.lake_path),
             "--mvs", str(self.mvs_path), 
             "--queries", queries_dir,
@@ -113,7 +238,7 @@ class BenchmarkRunner:
         ]
         
         print("📊 Executing optimized query batch...")
-        result = subprocess.run(cmd, capture_output=True, text=True)
+        result = self._run_in_process("runner", argv)
         
         total_time = time.perf_counter() - start_time
         
@@ -122,34 +247,51 @@ class BenchmarkRunner:
         telemetry_path = output_path / "batch_telemetry_report.json"
         
         benchmark_results = {
-            "execution_success": result.returncode == 0,
+            "execution_success": result["returncode"] == 0,
             "total_time_sec": round(total_time, 2),
-            "stdout": result.stdout,
-            "stderr": result.stderr if result.stderr else None,
+            "stdout": result["stdout"],
+            "stderr": result["stderr"] or None,
         }
         
-        # Load detailed results if available
-        if report_path.exists():
-            with open(report_path, 'r') as f:
-                query_report = json.load(f)
-                benchmark_results["query_details"] = query_report
-                
-        if telemetry_path.exists():
-            with open(telemetry_path, 'r') as f:
-                telemetry_report = json.load(f)
-                benchmark_results["telemetry"] = telemetry_report
+        # Load detailed results if available (only the fields the summary consumes)
+        try:
+            benchmark_results["query_details"] = self._load_query_timings(report_path)
+        except FileNotFoundError:
+            pass
+            
+        try:
+            benchmark_results["telemetry"] = self._load_routing_summary(telemetry_path)
+        except FileNotFoundError:
+            pass
                 
         return benchmark_results
         
+    def _load_query_timings(self, report_path: Path) -> Dict[str, Any]:
+        """Read per-query name/seconds from report.json without holding the full tree."""
+        if ijson is not None:
+            with open(report_path, 'rb') as f:
+                queries = ijson.items(f, 'queries.item', use_float=True)
+                return {"queries": [{"query": q.get("query"), "seconds": q.get("seconds", 0)} for q in queries]}
+                
+        queries = orjson.loads(report_path.read_bytes()).get("queries", [])
+        return {"queries": [{"query": q.get("query"), "seconds": q.get("seconds", 0)} for q in queries]}
+        
+    def _load_routing_summary(self, telemetry_path: Path) -> Dict[str, Any]:
+        """Read only the routing_summary section of the telemetry report."""
+        if ijson is not None:
+            with open(telemetry_path, 'rb') as f:
+                routing_summary = next(ijson.items(f, 'routing_summary', use_float=True), {})
+            return {"routing_summary": routing_summary}
+            
+        telemetry_report = orjson.loads(telemetry_path.read_bytes())
+        return {"routing_summary": telemetry_report.get("routing_summary", {})}
+        
     def run_accuracy_validation(self) -> Dict[str, Any]:
         """Run correctness validation to ensure accuracy."""
         print("🎯 Running Accuracy Validation...")
         
-        import subprocess
-        
         # Run our comprehensive correctness guardrails
-        cmd = [
-            sys.executable, str(self.src_path / "correctness_guardrails.py"),
+        argv = [
             "--lake", str(self.lake_path),
             "--mvs", str(self.mvs_path),
             "--out", str(self.reports_path / "accuracy_validation.json"),
@@ -157,20 +299,19 @@ class BenchmarkRunner:
             "--mem", self.memory_limit
         ]
         
-        result = subprocess.run(cmd, capture_output=True, text=True)
+        result = self._run_in_process("correctness_guardrails", argv)
         
         validation_results = {
-            "validation_success": result.returncode == 0,
-            "stdout": result.stdout,
-            "stderr": result.stderr if result.stderr else None
+            "validation_success": result["returncode"] == 0,
+            "stdout": result["stdout"],
+            "stderr": result["stderr"] or None
         }
         
         # Load validation report
         report_path = self.reports_path / "accuracy_validation.json"
-        if report_path.exists():
-            with open(report_path, 'r') as f:
-                validation_report = json.load(f)
-                validation_results["correctness_tests"] = validation_report
+        validation_report = _read_json(report_path)
+        if validation_report is not None:
+            validation_results["correctness_tests"] = validation_report
                 
         return validation_results
         
@@ -183,10 +324,7 @@ class BenchmarkRunner:
         if not sample_queries.exists():
             return {"demo_skipped": "No sample queries available"}
             
-        import subprocess
-        
-        cmd = [
-            sys.executable, str(self.src_path / "safe_batch_runner.py"),
+        argv = [
             "--lake", str(self.lake_path),
             "--mvs", str(self.mvs_path),
             "--queries", str(sample_queries),
@@ -195,12 +333,12 @@ class BenchmarkRunner:
             "--mem", self.memory_limit
         ]
         
-        result = subprocess.run(cmd, capture_output=True, text=True)
+        result = self._run_in_process("safe_batch_runner", argv)
         
         return {
-            "demo_success": result.returncode == 0,
-            "stdout": result.stdout,
-            "stderr": result.stderr if result.stderr else None
+            "demo_success": result["returncode"] == 0,
+            "stdout": result["stdout"],
+            "stderr": result["stderr"] or None
         }
         
     def analyze_architecture_performance(self) -> Dict[str, Any]:
@@ -231,29 +369,26 @@ class BenchmarkRunner:
         }
         
         # Analyze MV directory
-        if self.mvs_path.exists():
-            mv_dirs = [d for d in self.mvs_path.iterdir() if d.is_dir()]
-            architecture_analysis["materialized_views"]["count"] = len(mv_dirs)
-            
-            # Calculate total size
-            import subprocess
-            try:
-                result = subprocess.run(
-                    ["du", "-sm", str(self.mvs_path)], 
-                    capture_output=True, text=True
-                )
-                if result.returncode == 0:
-                    size_mb = int(result.stdout.split()[0])
-                    architecture_analysis["materialized_views"]["total_size_mb"] = size_mb
-            except Exception:
-                pass
+        # One scandir pass both counts MV directories and sums their size from dirent data
+        try:
+            mv_count, total_bytes = 0, 0
+            with os.scandir(self.mvs_path) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        mv_count += 1
+                        total_bytes += _dir_bytes(entry.path)
+                    else:
+                        total_bytes += entry.stat(follow_symlinks=False).st_size
+            architecture_analysis["materialized_views"]["count"] = mv_count
+            architecture_analysis["materialized_views"]["total_size_mb"] = total_bytes // (1 << 20)
+        except OSError:
+            pass
                 
         # Load system status if available
         final_status = self.reports_path / "final_system_status.json"
-        if final_status.exists():
-            with open(final_status, 'r') as f:
-                status_report = json.load(f)
-                architecture_analysis["system_health"] = status_report.get("system_health_summary", {})
+        status_report = _read_json(final_status)
+        if status_report is not None:
+            architecture_analysis["system_health"] = status_report.get("system_health_summary", {})
                 
         return architecture_analysis
         
@@ -287,8 +422,8 @@ class BenchmarkRunner:
             ]
         }
         
-        with open(report_path, 'w') as f:
-            json.dump(final_report, f, indent=2)
+        with open(report_path, 'wb') as f:
+            f.write(orjson.dumps(final_report, option=orjson.OPT_INDENT_2))
             
         return str(report_path)
         
@@ -298,6 +433,8 @@ class BenchmarkRunner:
             "total_execution_time_sec": 0,
             "queries_executed": 0,
             "avg_query_time_ms": 0,
+            "p95_query_time_ms": 0,
+            "p99_query_time_ms": 0,
             "mv_hit_rate": 0,
             "accuracy_validation_passed": False
         }
@@ -309,9 +446,12 @@ class BenchmarkRunner:
             summary["queries_executed"] = len(queries)
             
             if queries:
-                total_seconds = sum(q.get("seconds", 0) for q in queries)
-                summary["total_execution_time_sec"] = round(total_seconds, 2)
-                summary["avg_query_time_ms"] = round(total_seconds / len(queries) * 1000, 1)
+                seconds = _query_seconds(queries)
+                p95, p99 = np.percentile(seconds, [95, 99])
+                summary["total_execution_time_sec"] = round(float(seconds.sum()), 2)
+                summary["avg_query_time_ms"] = round(float(seconds.mean()) * 1000, 1)
+                summary["p95_query_time_ms"] = round(float(p95) * 1000, 1)
+                summary["p99_query_time_ms"] = round(float(p99) * 1000, 1)
                 
         # Extract telemetry info
         if "telemetry" in benchmark:
@@ -346,11 +486,13 @@ class BenchmarkRunner:
         print()
         
         # 3. Accuracy Validation
-        results["accuracy_validation"] = self.run_accuracy_validation()
+        results["accuracy_validation"] = self._cached_stage(
+            "accuracy_validation", self.run_accuracy_validation, [self.reports_path / "accuracy_validation.json"])
         print()
         
         # 4. Safe Batch Demo
-        results["safe_batch_demo"] = self.run_safe_batch_demo()
+        results["safe_batch_demo"] = self._cached_stage(
+            "safe_batch_demo", self.run_safe_batch_demo, [self.reports_path / "safe_batch_demo"])
         print()
         
         # 5. Generate Report
@@ -395,13 +537,16 @@ Examples:
                        help="Memory limit (default: 12GB for M2 MacBook)")
     parser.add_argument("--threads", type=int, default=8,
                        help="Thread count (default: 8 for M2)")
+    parser.add_argument("--no-cache", action="store_true",
+                       help="Re-run demo stages even if lake/MVs are unchanged")
     
     args = parser.parse_args()
     
     # Initialize runner
     runner = BenchmarkRunner(
         memory_limit=args.memory,
-        threads=args.threads
+        threads=args.threads,
+        use_cache=not args.no_cache
     )
     
     if args.demo_all:
@@ -432,10 +577,12 @@ Examples:
             # Print performance summary
             if "query_details" in results:
                 queries = results["query_details"].get("queries", [])
-                total_time = sum(q.get("seconds", 0) for q in queries)
+                seconds = _query_seconds(queries)
                 print(f"   📊 Queries executed: {len(queries)}")
-                print(f"   ⚡ Total time: {total_time:.2f}s")
-                print(f"   ⚡ Avg time: {total_time/len(queries)*1000:.1f}ms" if queries else "")
+                print(f"   ⚡ Total time: {seconds.sum():.2f}s")
+                if queries:
+                    print(f"   ⚡ Avg time: {seconds.mean()*1000:.1f}ms")
+                    print(f"   ⚡ p95 time: {np.percentile(seconds, 95)*1000:.1f}ms")
                 
             print(f"   📁 Results: {args.output}")
         else:
@@ -5,37 +5,99 @@ Consolidated Query Benchmark Runner
 Runs all queries from the consolidated test suite and provides detailed timing analysis.
 """
 
-import json
+import re
+import math
+import hashlib
+import random
 import time
+import orjson
 import sys
 import os
+import logging
+import logging.handlers
+from array import array
+from dataclasses import dataclass, asdict, replace
+from collections import defaultdict
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Set
+from concurrent.futures import ThreadPoolExecutor
 import statistics
+import numpy as np
 
 # Add src to path
 sys.path.append(str(Path(__file__).parent / 'src'))
 
 from safe_batch_runner import SafeBatchRunner
 
+logger = logging.getLogger(__name__)
+
+# SQL normalization for --dedup keys: collapse whitespace, ASCII-only case folding
+_WS_RE = re.compile(r"\s+")
+_LOWER_TBL = bytes.maketrans(bytes(range(65, 91)), bytes(range(97, 123)))
+
+@dataclass
+class QueryTiming:
+    """Outcome of one benchmarked query; timings are integer nanoseconds."""
+    __slots__ = ('name', 'category', 'success', 'total_time_ns', 'execution_time_ns',
+                 'parse_plan_ns', 'timing_samples', 'table_used', 'row_count', 'error', 'cached')
+    name: str
+    category: str
+    success: bool
+    total_time_ns: int
+    execution_time_ns: int
+    parse_plan_ns: int
+    timing_samples: Optional[Dict[str, Any]]
+    table_used: Optional[str]
+    row_count: int
+    error: Optional[str]
+    cached: bool
+
 class ConsolidatedBenchmark:
     """Runs comprehensive timing benchmarks on consolidated query suite."""
     
-    def __init__(self, memory: str = "12GB", threads: int = 8):
+    def __init__(self, memory: str = "12GB", threads: int = 8,
+                 repeat: int = 1, warmup: int = 0, cold: bool = False, concurrency: int = 1,
+                 write_csv: bool = False, write_arrow: bool = False, dedup: bool = False, schedule: str = "suite",
+                 pin_cores: Optional[str] = None):
         self.memory = memory
         self.threads = threads
+        self.repeat = max(1, repeat)
+        self.warmup = max(0, warmup)
+        self.cold = cold
+        self.write_csv = write_csv
+        self.write_arrow = write_arrow
+        self.dedup = dedup
+        self.schedule = schedule
+        self.pin_cores = pin_cores
+        self.cpu_affinity: Optional[Dict[str, List[int]]] = None
+        # Successful results keyed by normalized-SQL hash, reused when --dedup is set
+        self._query_cache: Dict[bytes, QueryTiming] = {}
+        # Cold runs reset the shared session, so they must not overlap other queries
+        self.concurrency = 1 if cold else max(1, concurrency)
         self.lake_path = "data/lake"
         self.mvs_path = "data/mvs_rebuilt"
         self.output_path = "results/consolidated_benchmark"
+        self.results_stream_path = Path("reports/consolidated_results.ndjson")
         
         # Ensure output directory exists
         Path(self.output_path).mkdir(parents=True, exist_ok=True)
         
-        print(f"🚀 Consolidated Query Benchmark Runner")
-        print(f"📊 Configuration: {memory} memory, {threads} threads")
-        print(f"🏗️  Lake: {self.lake_path}")
-        print(f"📚 MVs: {self.mvs_path}")
-        print()
+        # One runner (and DuckDB session) shared by every query in the suite
+        self.runner = SafeBatchRunner(
+            lake_path=self.lake_path,
+            mvs_path=self.mvs_path,
+            output_path=self.output_path,
+            memory=self.memory,
+            threads=self.threads
+        )
+        
+        logger.info(f"🚀 Consolidated Query Benchmark Runner")
+        logger.info(f"📊 Configuration: {memory} memory, {threads} threads")
+        logger.info(f"⏱️  Timing: {'cold' if cold else 'warm'}, {self.warmup} warmup, {self.repeat} timed runs")
+        logger.info(f"🔀 Concurrency: {self.concurrency} queries in flight, {schedule} order")
+        logger.info(f"🏗️  Lake: {self.lake_path}")
+        logger.info(f"📚 MVs: {self.mvs_path}")
+        logger.info("")
         
     def load_query_suite(self) -> List[Dict[str, Any]]:
         """Load the consolidated query test suite."""
@@ -44,106 +106,202 @@ class ConsolidatedBenchmark:
         if not suite_path.exists():
             raise FileNotFoundError(f"Consolidated test suite not found at {suite_path}")
             
-        with open(suite_path, 'r') as f:
-            queries = json.load(f)
+        queries = orjson.loads(suite_path.read_bytes())
+        # Few distinct categories; share one string object per value for cheap dict lookups
+        for query_spec in queries:
+            query_spec["category"] = sys.intern(query_spec["category"])
             
-        print(f"📋 Loaded {len(queries)} queries from consolidated test suite")
+        logger.info(f"📋 Loaded {len(queries)} queries from consolidated test suite")
         return queries
         
-    def execute_query_with_timing(self, query_spec: Dict[str, Any]) -> Dict[str, Any]:
+    def execute_query_with_timing(self, query_spec: Dict[str, Any], runner: SafeBatchRunner) -> QueryTiming:
         """Execute a single query with detailed timing."""
         
         name = query_spec["name"]
         category = query_spec["category"]
         query = query_spec["query"]
+        output_name = f"{name}.csv" if self.write_csv else f"{name}.arrow" if self.write_arrow else None
         
-        print(f"   📋 {name} ({category})")
-        
-        # Initialize runner
-        runner = SafeBatchRunner(
-            lake_path=self.lake_path,
-            mvs_path=self.mvs_path,
-            output_path=self.output_path,
-            memory=self.memory,
-            threads=self.threads
-        )
-        
-        # Time the query execution
-        start_time = time.perf_counter()
+        # Time the query execution in integer nanoseconds; ms conversion happens at report time
+        start_ns = time.perf_counter_ns()
         
         try:
-            # Execute query directly
-            exec_start = time.perf_counter()
-            results = runner.execute_single_query(query, f"{name}.csv")
-            exec_time = (time.perf_counter() - exec_start) * 1000
-            
-            total_time = (time.perf_counter() - start_time) * 1000
+            if self.dedup:
+                cache_key = self._query_key(query, runner)
+                cached = self._query_cache.get(cache_key)
+                if cached is not None:
+                    logger.info(f"   📋 {name} ({category})\n"
+                                f"      ♻️  Identical to {cached.name}; reusing its timings")
+                    return replace(cached, name=name, category=category, cached=True)
+                    
+            # Untimed warmup runs populate DuckDB's buffer pool and object cache
+            parse_plan_ns = 0
+            if not self.cold:
+                for _ in range(self.warmup):
+                    results = runner.execute_single_query(query, output_name, return_rows=False)
+                    parse_plan_ns = max(parse_plan_ns, results["prepare_ns"])
+                    
+            samples = []
+            for _ in range(self.repeat):
+                if self.cold:
+                    runner.clear_cache(drop_os_cache=True)
+                    # Reconnect (connect + PRAGMAs) before the timed window; only the caches start cold
+                    runner.get_session_cursor()
+                exec_start = time.perf_counter_ns()
+                results = runner.execute_single_query(query, output_name, return_rows=False)
+                # Samples are steady-state execution; planning is reported separately
+                samples.append(time.perf_counter_ns() - exec_start - results["prepare_ns"])
+                parse_plan_ns = max(parse_plan_ns, results["prepare_ns"])
+                
+            total_ns = time.perf_counter_ns() - start_ns
+            exec_ns = int(statistics.median(samples))
             
             # Extract execution info
-            table_used = results.get('table', 'unknown')
-            row_count = len(results.get('results', []))
+            table_used = sys.intern(results.get('table', 'unknown'))
+            row_count = results["row_count"]
             
-            result = {
-                "name": name,
-                "category": category,
-                "success": True,
-                "total_time_ms": round(total_time, 2),
-                "execution_time_ms": round(exec_time, 2),
-                "table_used": table_used,
-                "row_count": row_count,
-                "error": None
-            }
+            result = QueryTiming(
+                name=name,
+                category=category,
+                success=True,
+                total_time_ns=total_ns,
+                execution_time_ns=exec_ns,
+                parse_plan_ns=parse_plan_ns,
+                timing_samples=self._sample_stats(samples),
+                table_used=table_used,
+                row_count=row_count,
+                error=None,
+                cached=False
+            )
+            if self.dedup:
+                self._query_cache[cache_key] = result
             
-            print(f"      ⚡ {total_time:.1f}ms total ({exec_time:.1f}ms exec)")
-            print(f"      📊 {row_count} rows from {table_used}")
+            # Reported once the query is done so logging never lands inside a timed run
+            logger.info(f"   📋 {name} ({category})\n"
+                        f"      ⚡ {total_ns / 1e6:.1f}ms total ({exec_ns / 1e6:.1f}ms median exec over {len(samples)} runs, "
+                        f"{parse_plan_ns / 1e6:.1f}ms plan)\n"
+                        f"      📊 {row_count} rows from {table_used}")
             
         except Exception as e:
-            total_time = (time.perf_counter() - start_time) * 1000
+            result = QueryTiming(
+                name=name,
+                category=category,
+                success=False,
+                total_time_ns=time.perf_counter_ns() - start_ns,
+                execution_time_ns=0,
+                parse_plan_ns=0,
+                timing_samples=None,
+                table_used=None,
+                row_count=0,
+                error=str(e),
+                cached=False
+            )
             
-            result = {
-                "name": name,
-                "category": category,
-                "success": False,
-                "total_time_ms": round(total_time, 2),
-                "execution_time_ms": 0,
-                "table_used": None,
-                "row_count": 0,
-                "error": str(e)
-            }
-            
-            print(f"      ❌ Failed: {str(e)}")
+            logger.error(f"   📋 {name} ({category})\n"
+                         f"      ❌ Failed: {str(e)}")
             
         return result
         
+    @staticmethod
+    def _parse_cpu_list(spec: str) -> Set[int]:
+        """Parse a taskset-style CPU list such as '1-7' or '0,2,4-5'."""
+        cpus = set()
+        for part in spec.split(","):
+            first, _, last = part.strip().partition("-")
+            cpus.update(range(int(first), int(last or first) + 1))
+        return cpus
+        
+    def pin_affinity(self) -> None:
+        """Run DuckDB's worker threads on --pin-cores and keep the Python driver off them."""
+        if not hasattr(os, "sched_setaffinity"):
+            logger.info("⚠️  CPU pinning needs os.sched_setaffinity (Linux); running unpinned")
+            return
+            
+        available = os.sched_getaffinity(0)
+        engine = self._parse_cpu_list(self.pin_cores) & available
+        if not engine:
+            raise ValueError(f"--pin-cores {self.pin_cores} matches no CPU available to this process")
+        # Cold runs reopen DuckDB from the driver thread, so they must share the engine's cores
+        driver = engine if self.cold else (available - engine) or engine
+        
+        # DuckDB starts its worker threads when the session opens; they inherit this mask
+        os.sched_setaffinity(0, engine)
+        self.runner.get_session_connection()
+        os.sched_setaffinity(0, driver)
+        
+        self.cpu_affinity = {"duckdb": sorted(engine), "driver": sorted(driver)}
+        logger.info(f"📌 CPU affinity: DuckDB on {self.cpu_affinity['duckdb']}, driver on {self.cpu_affinity['driver']}")
+        
+    def schedule_queries(self, queries: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Order the suite for execution; 'table' runs same-table queries back-to-back."""
+        if self.schedule == "random":
+            queries = list(queries)
+            random.shuffle(queries)
+        elif self.schedule == "table":
+            # Dry pass through the router to learn each query's table without executing it
+            def table_of(query_spec):
+                try:
+                    return self.runner.build_query_sql(query_spec["query"])[0]
+                except Exception:
+                    return ""
+            # Stable sort keeps suite (and so category) order within each table
+            queries = sorted(queries, key=table_of)
+        return queries
+        
+    @staticmethod
+    def _query_key(query: Dict[str, Any], runner: SafeBatchRunner) -> bytes:
+        """Hash of the planned table plus whitespace/case-normalized SQL."""
+        table, sql = runner.build_query_sql(query)
+        normalized = _WS_RE.sub(" ", f"{table}|{sql.strip()}").encode("utf-8").translate(_LOWER_TBL)
+        return hashlib.blake2b(normalized, digest_size=16).digest()
+        
+    @staticmethod
+    def _sample_stats(samples: List[int]) -> Dict[str, Any]:
+        """Summarize repeated timings (ns) of one query, reported in ms."""
+        ordered = sorted(samples)
+        return {
+            "runs": len(ordered),
+            "median_ms": round(statistics.median(ordered) * 1e-6, 2),
+            "p95_ms": round(ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))] * 1e-6, 2),
+            "min_ms": round(ordered[0] * 1e-6, 2),
+            "stdev_ms": round(statistics.stdev(ordered) * 1e-6, 2) if len(ordered) > 1 else 0.0
+        }
+        
     def run_benchmark(self) -> Dict[str, Any]:
         """Run the complete consolidated benchmark."""
         
-        print("🔥 Starting Consolidated Query Benchmark")
-        print("=" * 60)
+        logger.info("🔥 Starting Consolidated Query Benchmark")
+        logger.info("=" * 60)
         
         # Load query suite
-        query_suite = self.load_query_suite()
+        query_suite = self.schedule_queries(self.load_query_suite())
         
-        # Execute all queries
-        results = []
-        categories = {}
+        if self.pin_cores:
+            self.pin_affinity()
+            
+        # Only running aggregates stay in memory; per-query records stream to NDJSON
+        categories = defaultdict(self._new_category_stats)
+        tables = defaultdict(lambda: {"count": 0, "sum": 0, "rows": 0})
+        totals = {"queries": 0, "cached": 0, "exec_ns": array('q'), "rows": array('q')}
+        self.results_stream_path.parent.mkdir(parents=True, exist_ok=True)
         
         benchmark_start = time.perf_counter()
         
-        for query_spec in query_suite:
-            result = self.execute_query_with_timing(query_spec)
-            results.append(result)
-            
-            # Track by category
-            category = result["category"]
-            if category not in categories:
-                categories[category] = []
-            categories[category].append(result)
+        try:
+            # DuckDB releases the GIL while executing, so queries overlap on its shared thread pool
+            with ThreadPoolExecutor(max_workers=self.concurrency) as pool, \
+                    open(self.results_stream_path, 'wb', buffering=64 * 1024) as stream:
+                execute = lambda q: self.execute_query_with_timing(q, self.runner)
+                completed = pool.map(execute, query_suite) if self.concurrency > 1 else map(execute, query_suite)
+                for result in completed:
+                    self._record_result(result, stream, categories, tables, totals)
+        finally:
+            self.runner.close()
             
         total_benchmark_time = (time.perf_counter() - benchmark_start)
         
         # Generate comprehensive analysis
-        analysis = self.analyze_results(results, categories, total_benchmark_time)
+        analysis = self.analyze_results(categories, tables, totals, total_benchmark_time)
         
         # Save results
         self.save_results(analysis)
@@ -153,138 +311,178 @@ class ConsolidatedBenchmark:
         
         return analysis
         
-    def analyze_results(self, results: List[Dict], categories: Dict, total_time: float) -> Dict[str, Any]:
-        """Analyze benchmark results."""
+    def _record_result(self, result: QueryTiming, stream, categories: Dict, tables: Dict, totals: Dict) -> None:
+        """Append one finished query to the NDJSON stream and fold it into the aggregates."""
+        stream.write(orjson.dumps(self._report_entry(result)))
+        stream.write(b"\n")
+        
+        totals["queries"] += 1
+        totals["cached"] += result.cached
+        stats = categories[result.category]
+        stats["count"] += 1
+        if result.success:
+            exec_ns = result.execution_time_ns
+            totals["exec_ns"].append(exec_ns)
+            totals["rows"].append(result.row_count)
+            stats["ok"] += 1
+            stats["sum"] += exec_ns
+            stats["min"] = min(stats["min"], exec_ns)
+            stats["max"] = max(stats["max"], exec_ns)
+            stats["times"].append(exec_ns)
+            usage = tables[result.table_used]
+            usage["count"] += 1
+            usage["sum"] += exec_ns
+            usage["rows"] += result.row_count
+            
+    @staticmethod
+    def _new_category_stats() -> Dict[str, Any]:
+        """Running aggregates (ns) for one category; times is a compact int64 buffer."""
+        return {"count": 0, "ok": 0, "sum": 0, "min": math.inf, "max": -math.inf, "times": array('q')}
         
-        successful_results = [r for r in results if r["success"]]
-        failed_results = [r for r in results if not r["success"]]
+    def analyze_results(self, categories: Dict, tables: Dict, totals: Dict, total_time: float) -> Dict[str, Any]:
+        """Analyze benchmark results from the running aggregates."""
         
-        if not successful_results:
+        n_total = totals["queries"]
+        n_ok = len(totals["exec_ns"])
+        
+        if not n_ok:
             return {
                 "error": "No successful queries",
-                "total_queries": len(results),
-                "failed_queries": len(failed_results)
+                "total_queries": n_total,
+                "failed_queries": n_total
             }
             
-        # Overall statistics
-        exec_times = [r["execution_time_ms"] for r in successful_results]
-        total_times = [r["total_time_ms"] for r in successful_results]
-        row_counts = [r["row_count"] for r in successful_results]
-        
-        # Table usage analysis
-        table_usage = {}
-        for result in successful_results:
-            table = result["table_used"]
-            if table not in table_usage:
-                table_usage[table] = []
-            table_usage[table].append(result)
-            
+        # Overall statistics, computed in C over contiguous arrays
+        exec_ns = np.frombuffer(totals["exec_ns"], dtype=np.int64)
+        row_arr = np.frombuffer(totals["rows"], dtype=np.int64)
+        total_exec_ms = int(exec_ns.sum()) * 1e-6
+        exec_arr = exec_ns * 1e-6
+        # Order statistic via O(n) selection instead of a full sort
+        p95_k = int(0.95 * (n_ok - 1))
+        
         # Category analysis
         category_stats = {}
-        for category, cat_results in categories.items():
-            success_results = [r for r in cat_results if r["success"]]
-            if success_results:
-                cat_exec_times = [r["execution_time_ms"] for r in success_results]
+        for category, stats in categories.items():
+            if stats["ok"]:
                 category_stats[category] = {
-                    "query_count": len(cat_results),
-                    "successful": len(success_results),
-                    "failed": len(cat_results) - len(success_results),
-                    "avg_exec_time_ms": round(statistics.mean(cat_exec_times), 2),
-                    "min_exec_time_ms": round(min(cat_exec_times), 2),
-                    "max_exec_time_ms": round(max(cat_exec_times), 2),
-                    "total_exec_time_ms": round(sum(cat_exec_times), 2)
+                    "query_count": stats["count"],
+                    "successful": stats["ok"],
+                    "failed": stats["count"] - stats["ok"],
+                    "avg_exec_time_ms": round(stats["sum"] / stats["ok"] * 1e-6, 2),
+                    "median_exec_time_ms": round(float(np.median(np.frombuffer(stats["times"], dtype=np.int64))) * 1e-6, 2),
+                    "min_exec_time_ms": round(stats["min"] * 1e-6, 2),
+                    "max_exec_time_ms": round(stats["max"] * 1e-6, 2),
+                    "total_exec_time_ms": round(stats["sum"] * 1e-6, 2)
                 }
         
         return {
             "benchmark_summary": {
-                "total_queries": len(results),
-                "successful_queries": len(successful_results),
-                "failed_queries": len(failed_results),
-                "success_rate": round(len(successful_results) / len(results) * 100, 1),
+                "total_queries": n_total,
+                "successful_queries": n_ok,
+                "failed_queries": n_total - n_ok,
+                "success_rate": round(n_ok / n_total * 100, 1),
                 "total_benchmark_time_sec": round(total_time, 2),
-                "total_execution_time_ms": round(sum(exec_times), 2),
-                "queries_per_second": round(len(successful_results) / total_time, 2)
+                "total_execution_time_ms": round(total_exec_ms, 2),
+                "queries_per_second": round(n_ok / total_time, 2),
+                "dedup_ratio": round(totals["cached"] / n_total, 3)
             },
             "performance_statistics": {
-                "avg_execution_time_ms": round(statistics.mean(exec_times), 2),
-                "median_execution_time_ms": round(statistics.median(exec_times), 2),
-                "min_execution_time_ms": round(min(exec_times), 2),
-                "max_execution_time_ms": round(max(exec_times), 2),
-                "p95_execution_time_ms": round(statistics.quantiles(exec_times, n=20)[18], 2) if len(exec_times) > 20 else round(max(exec_times), 2),
-                "total_rows_returned": sum(row_counts)
+                "avg_execution_time_ms": round(total_exec_ms / n_ok, 2),
+                "median_execution_time_ms": round(float(np.median(exec_arr)), 2),
+                "min_execution_time_ms": round(float(exec_arr.min()), 2),
+                "max_execution_time_ms": round(float(exec_arr.max()), 2),
+                "p95_execution_time_ms": round(float(np.partition(exec_arr, p95_k)[p95_k]), 2),
+                "total_rows_returned": int(row_arr.sum())
             },
             "table_usage_analysis": {
                 table: {
-                    "query_count": len(queries),
-                    "avg_time_ms": round(statistics.mean([q["execution_time_ms"] for q in queries]), 2),
-                    "total_rows": sum([q["row_count"] for q in queries])
+                    "query_count": usage["count"],
+                    "avg_time_ms": round(usage["sum"] / usage["count"] * 1e-6, 2),
+                    "total_rows": usage["rows"]
                 }
-                for table, queries in table_usage.items()
+                for table, usage in tables.items()
             },
             "category_analysis": category_stats,
-            "detailed_results": results,
+            "detailed_results_file": str(self.results_stream_path),
             "configuration": {
                 "memory": self.memory,
                 "threads": self.threads,
+                "timing_mode": "cold" if self.cold else "warm",
+                "warmup_runs": self.warmup,
+                "timed_runs": self.repeat,
+                "concurrency": self.concurrency,
+                "write_csv": self.write_csv,
+                "write_arrow": self.write_arrow,
+                "dedup": self.dedup,
+                "schedule": self.schedule,
+                "cpu_affinity": self.cpu_affinity,
                 "lake_path": self.lake_path,
                 "mvs_path": self.mvs_path
             }
         }
         
+    @staticmethod
+    def _report_entry(result: QueryTiming) -> Dict[str, Any]:
+        """Per-query record for the report, with ns timings converted to ms."""
+        return {
+            (key[:-3] + "_ms" if key.endswith("_ns") else key): (round(value * 1e-6, 2) if key.endswith("_ns") else value)
+            for key, value in asdict(result).items()
+        }
+        
     def save_results(self, analysis: Dict[str, Any]) -> None:
         """Save benchmark results to file."""
         
         output_file = Path("reports/consolidated_benchmark_results.json")
         output_file.parent.mkdir(parents=True, exist_ok=True)
         
-        with open(output_file, 'w') as f:
-            json.dump(analysis, f, indent=2)
+        with open(output_file, 'wb', buffering=64 * 1024) as f:
+            f.write(orjson.dumps(analysis, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY))
             
-        print(f"💾 Results saved to: {output_file}")
+        logger.info(f"💾 Results saved to: {output_file}")
         
     def print_summary(self, analysis: Dict[str, Any]) -> None:
         """Print benchmark summary."""
         
         if "error" in analysis:
-            print(f"❌ Benchmark failed: {analysis['error']}")
+            logger.error(f"❌ Benchmark failed: {analysis['error']}")
             return
             
         summary = analysis["benchmark_summary"]
         perf = analysis["performance_statistics"]
         
-        print()
-        print("📊 Consolidated Benchmark Results")
-        print("=" * 50)
-        print(f"Total Queries: {summary['total_queries']}")
-        print(f"Successful: {summary['successful_queries']} ({summary['success_rate']}%)")
-        print(f"Failed: {summary['failed_queries']}")
-        print(f"Benchmark Time: {summary['total_benchmark_time_sec']:.1f}s")
-        print(f"Throughput: {summary['queries_per_second']:.1f} queries/sec")
-        print()
-        
-        print("⚡ Performance Statistics:")
-        print(f"  Average: {perf['avg_execution_time_ms']:.1f}ms")
-        print(f"  Median: {perf['median_execution_time_ms']:.1f}ms")
-        print(f"  Min: {perf['min_execution_time_ms']:.1f}ms")
-        print(f"  Max: {perf['max_execution_time_ms']:.1f}ms")
-        print(f"  P95: {perf['p95_execution_time_ms']:.1f}ms")
-        print(f"  Total Rows: {perf['total_rows_returned']:,}")
-        print()
-        
-        print("🎯 Table Usage:")
+        logger.info("")
+        logger.info("📊 Consolidated Benchmark Results")
+        logger.info("=" * 50)
+        logger.info(f"Total Queries: {summary['total_queries']}")
+        logger.info(f"Successful: {summary['successful_queries']} ({summary['success_rate']}%)")
+        logger.info(f"Failed: {summary['failed_queries']}")
+        logger.info(f"Benchmark Time: {summary['total_benchmark_time_sec']:.1f}s")
+        logger.info(f"Throughput: {summary['queries_per_second']:.1f} queries/sec")
+        logger.info("")
+        
+        logger.info("⚡ Performance Statistics:")
+        logger.info(f"  Average: {perf['avg_execution_time_ms']:.1f}ms")
+        logger.info(f"  Median: {perf['median_execution_time_ms']:.1f}ms")
+        logger.info(f"  Min: {perf['min_execution_time_ms']:.1f}ms")
+        logger.info(f"  Max: {perf['max_execution_time_ms']:.1f}ms")
+        logger.info(f"  P95: {perf['p95_execution_time_ms']:.1f}ms")
+        logger.info(f"  Total Rows: {perf['total_rows_returned']:,}")
+        logger.info("")
+        
+        logger.info("🎯 Table Usage:")
         table_usage = analysis["table_usage_analysis"]
         for table, stats in sorted(table_usage.items(), key=lambda x: x[1]['query_count'], reverse=True):
             percentage = (stats['query_count'] / summary['successful_queries']) * 100
-            print(f"  {table}: {stats['query_count']} queries ({percentage:.1f}%) - {stats['avg_time_ms']:.1f}ms avg")
-        print()
+            logger.info(f"  {table}: {stats['query_count']} queries ({percentage:.1f}%) - {stats['avg_time_ms']:.1f}ms avg")
+        logger.info("")
         
-        print("📋 Category Performance:")
+        logger.info("📋 Category Performance:")
         categories = analysis["category_analysis"]
         for category, stats in sorted(categories.items(), key=lambda x: x[1]['avg_exec_time_ms']):
-            print(f"  {category}: {stats['avg_exec_time_ms']:.1f}ms avg ({stats['successful']}/{stats['query_count']} queries)")
+            logger.info(f"  {category}: {stats['avg_exec_time_ms']:.1f}ms avg ({stats['successful']}/{stats['query_count']} queries)")
         
-        print()
-        print("🏆 Consolidated Benchmark Complete!")
+        logger.info("")
+        logger.info("🏆 Consolidated Benchmark Complete!")
 
 def main():
     """Main execution function."""
@@ -294,16 +492,44 @@ def main():
     parser = argparse.ArgumentParser(description="Consolidated Query Benchmark Runner")
     parser.add_argument("--memory", default="12GB", help="Memory limit (default: 12GB)")
     parser.add_argument("--threads", type=int, default=8, help="Thread count (default: 8)")
+    parser.add_argument("--repeat", type=int, default=1, help="Timed runs per query; median is reported (default: 1)")
+    parser.add_argument("--warmup", type=int, default=0, help="Untimed warmup runs per query in warm mode (default: 0)")
+    parser.add_argument("--cold", action="store_true",
+                        help="Reset DuckDB (and, as root on Linux, the OS page cache) before every timed run")
+    parser.add_argument("--write-csv", action="store_true",
+                        help="Also stage each query's CSV output under the results directory")
+    parser.add_argument("--write-arrow", action="store_true",
+                        help="Stage each query's output as an Arrow IPC file instead (ignored with --write-csv)")
+    parser.add_argument("--dedup", action="store_true",
+                        help="Reuse results of queries whose normalized SQL was already executed")
+    parser.add_argument("--schedule", choices=["suite", "table", "random"], default="suite",
+                        help="Execution order: suite file order, grouped by routed table, or shuffled (default: suite)")
+    parser.add_argument("--pin-cores", metavar="CPUS",
+                        help="Pin DuckDB worker threads to these CPUs (e.g. 1-7) and the driver to the rest; Linux only")
+    parser.add_argument("--concurrency", type=int, default=1,
+                        help="Queries executed in parallel on the shared DuckDB session (default: 1; ignored with --cold)")
     
     args = parser.parse_args()
     
+    # Buffer report lines in memory and write them to stdout in batches
+    logging.basicConfig(level=logging.INFO, format="%(message)s",
+                        handlers=[logging.handlers.MemoryHandler(
+                            capacity=1024, target=logging.StreamHandler(sys.stdout))])
+    
     try:
-        benchmark = ConsolidatedBenchmark(memory=args.memory, threads=args.threads)
+        benchmark = ConsolidatedBenchmark(memory=args.memory, threads=args.threads,
+                                          repeat=args.repeat, warmup=args.warmup, cold=args.cold,
+                                          concurrency=args.concurrency, write_csv=args.write_csv,
+                                          write_arrow=args.write_arrow,
+                                          dedup=args.dedup, schedule=args.schedule,
+                                          pin_cores=args.pin_cores)
         benchmark.run_benchmark()
         
     except Exception as e:
-        print(f"❌ Benchmark failed: {e}")
+        logger.error(f"❌ Benchmark failed: {e}")
         sys.exit(1)
+    finally:
+        logging.shutdown()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -9,26 +9,53 @@ Rebuilds all materialized views using the cleaned data lake with:
 """
 
 import os
+import re
 import sys
+import shutil
 import time
-import json
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
 
 # Add src to path for imports
 sys.path.append(str(Path(__file__).parent.parent / "src"))
 
 import duckdb
+import orjson
 from sqlgen import AliasNormalizer
 
+# Exact distinct counts in MV SQL, swapped for HyperLogLog when approx_distinct is set
+_COUNT_DISTINCT_RE = re.compile(r"COUNT\(DISTINCT (\w+)\)")
+
+# Written into each MV directory; a matching fingerprint means the MV is up to date
+_FINGERPRINT_FILE = "_FINGERPRINT"
+
 class MVRebuilder:
-    def __init__(self, lake_path: str, mv_path: str, threads: int = 4, memory: str = "4GB"):
+    def __init__(self, lake_path: str, mv_path: str, threads: int = 4, memory: str = "4GB",
+                 approx_distinct: bool = False, parallel: bool = False,
+                 row_group_size: int = 1048576, compression: str = "zstd", force: bool = False,
+                 tmp_dir: str = "/tmp/duckdb_mv.tmp", max_temp_size: str = "50GB"):
         self.lake_path = lake_path
         self.mv_path = mv_path  
         self.threads = threads
         self.memory = memory
+        self.approx_distinct = approx_distinct
+        self.parallel = parallel
+        self.row_group_size = row_group_size
+        self.compression = compression
+        self.force = force
+        self.tmp_dir = tmp_dir
+        self.max_temp_size = max_temp_size
+        self.lake_fingerprint = None  # Computed once per rebuild_all_mvs
         self.normalizer = AliasNormalizer()
         self.results = []
+        self.con = None  # Shared by all MVs for the duration of rebuild_all_mvs
+        # Templates are static, so alias normalization runs once here rather than per rebuild
+        self.mv_definitions = [
+            {**mv_def, "sql": self._prepare_template(mv_def["sql"])}
+            for mv_def in self.get_mv_definitions()
+        ]
         
     def setup_connection(self) -> duckdb.DuckDBPyConnection:
         """Create optimized DuckDB connection."""
@@ -36,10 +63,30 @@ class MVRebuilder:
         con.execute(f"PRAGMA threads={self.threads};")
         con.execute(f"SET memory_limit='{self.memory}';")
         con.execute("SET TimeZone='UTC';")
+        # Let COPY stream aggregate output without restoring input order
+        con.execute("SET preserve_insertion_order=false;")
+        # Partitioned COPYs spill; keep spill files on fast local disk and fail before it fills
+        con.execute(f"SET temp_directory='{self.tmp_dir}';")
+        con.execute(f"SET max_temp_directory_size='{self.max_temp_size}';")
+        # Resolve the lake glob and hive partitions once; every query reads FROM events.
+        # The explicit column list bounds the scan even for SELECT * over the view.
+        try:
+            con.execute(f"""
+                CREATE VIEW events AS
+                SELECT day, hour, type, advertiser_id, publisher_id, user_id, country, bid_price, total_price
+                FROM read_parquet('{self.lake_path}/events/day=*/**/*.parquet', hive_partitioning=1)
+            """)
+        except duckdb.IOException as e:
+            # Without the view every MV fails and is reported individually
+            print(f"   ⚠️  Lake unreadable: {e}")
         return con
         
     def get_mv_definitions(self) -> List[Dict[str, Any]]:
-        """Define materialized view rebuild queries."""
+        """Define materialized view rebuild queries.
+        
+        The lake is post-remediation: data_quality_repair quarantines rows with a NULL
+        day, type, advertiser_id or publisher_id, so only country is NULL-filtered here.
+        """
         return [
             {
                 "name": "mv_all_adv_type_counts",
@@ -51,12 +98,21 @@ class MVRebuilder:
                     COUNT(DISTINCT day) as active_days,
                     MIN(day) as first_seen,
                     MAX(day) as last_seen,
-                    SUM(CASE WHEN total_price > 0 THEN total_price ELSE 0 END) as total_revenue
-                FROM read_parquet('{lake_path}/events/day=*/**/*.parquet')
-                WHERE advertiser_id IS NOT NULL 
-                  AND type IS NOT NULL
-                GROUP BY advertiser_id, type
-                ORDER BY advertiser_id, type
+                    COALESCE(SUM(total_price) FILTER (WHERE total_price > 0), 0) as total_revenue
+                FROM events
+                GROUP BY ALL
+                """,
+                "format": "single_file"
+            },
+            {
+                "name": "mv_lake_count",
+                "sql": """
+                SELECT 
+                    day,
+                    country,
+                    total_events
+                FROM lake_rollup
+                WHERE grouping_set = 'day_country'
                 """,
                 "format": "single_file"
             },
@@ -66,15 +122,17 @@ class MVRebuilder:
                 SELECT 
                     day,
                     advertiser_id,
-                    SUM(CASE WHEN type = 'impression' THEN 1 ELSE 0 END) as impressions,
-                    SUM(CASE WHEN type = 'click' THEN 1 ELSE 0 END) as clicks,
-                    SUM(CASE WHEN type = 'serve' THEN 1 ELSE 0 END) as serves,
-                    SUM(CASE WHEN type = 'purchase' THEN 1 ELSE 0 END) as purchases,
-                    SUM(CASE WHEN total_price > 0 THEN total_price ELSE 0 END) as revenue
-                FROM read_parquet('{lake_path}/events/day=*/**/*.parquet')
-                WHERE day IS NOT NULL AND advertiser_id IS NOT NULL
-                GROUP BY day, advertiser_id
-                ORDER BY day, advertiser_id
+                    impressions,
+                    clicks,
+                    serves,
+                    purchases,
+                    revenue,
+                    -- Normalized to "COUNT(*)" and "SUM(bid_price)"
+                    total_events as events_all,
+                    sum_bid_impr as sum_bid_impr
+                FROM lake_rollup
+                WHERE grouping_set = 'day_advertiser_id'
+                  AND day IS NOT NULL AND advertiser_id IS NOT NULL
                 """,
                 "format": "partitioned",
                 "partition_by": ["day"]
@@ -85,16 +143,17 @@ class MVRebuilder:
                 SELECT 
                     day,
                     country,
-                    SUM(CASE WHEN type = 'impression' THEN 1 ELSE 0 END) as impressions,
-                    SUM(CASE WHEN type = 'click' THEN 1 ELSE 0 END) as clicks,
-                    SUM(CASE WHEN type = 'serve' THEN 1 ELSE 0 END) as serves,
-                    SUM(CASE WHEN type = 'purchase' THEN 1 ELSE 0 END) as purchases,
+                    COUNT(*) FILTER (WHERE type = 'impression') as impressions,
+                    COUNT(*) FILTER (WHERE type = 'click') as clicks,
+                    COUNT(*) FILTER (WHERE type = 'serve') as serves,
+                    COUNT(*) FILTER (WHERE type = 'purchase') as purchases,
                     COUNT(DISTINCT user_id) as unique_users,
-                    SUM(CASE WHEN total_price > 0 THEN total_price ELSE 0 END) as revenue
-                FROM read_parquet('{lake_path}/events/day=*/**/*.parquet')
-                WHERE day IS NOT NULL AND country IS NOT NULL
-                GROUP BY day, country
-                ORDER BY day, country
+                    COALESCE(SUM(total_price) FILTER (WHERE total_price > 0), 0) as revenue,
+                    COUNT(*) as events_all,
+                    SUM(bid_price) FILTER (WHERE type = 'impression') as sum_bid_impr
+                FROM events
+                WHERE country IS NOT NULL
+                GROUP BY ALL
                 """,
                 "format": "partitioned",
                 "partition_by": ["day"]
@@ -110,11 +169,9 @@ class MVRebuilder:
                     COUNT(DISTINCT publisher_id) as unique_publishers,
                     COUNT(DISTINCT country) as unique_countries,
                     COUNT(DISTINCT user_id) as unique_users,
-                    SUM(CASE WHEN total_price > 0 THEN total_price ELSE 0 END) as revenue
-                FROM read_parquet('{lake_path}/events/day=*/**/*.parquet')
-                WHERE day IS NOT NULL AND type IS NOT NULL
-                GROUP BY day, type
-                ORDER BY day, type
+                    COALESCE(SUM(total_price) FILTER (WHERE total_price > 0), 0) as revenue
+                FROM events
+                GROUP BY ALL
                 """,
                 "format": "partitioned", 
                 "partition_by": ["day"]
@@ -123,82 +180,230 @@ class MVRebuilder:
                 "name": "mv_hour_advertiser_id_wide",
                 "sql": """
                 SELECT 
-                    DATE_TRUNC('hour', CAST(day || ' ' || LPAD(CAST(minute AS VARCHAR), 2, '0') || ':00:00' AS TIMESTAMP)) as hour,
+                    hour,
                     day,
                     advertiser_id,
-                    SUM(CASE WHEN type = 'impression' THEN 1 ELSE 0 END) as impressions,
-                    SUM(CASE WHEN type = 'click' THEN 1 ELSE 0 END) as clicks,
-                    SUM(CASE WHEN type = 'serve' THEN 1 ELSE 0 END) as serves,
-                    COUNT(*) as total_events,
-                    SUM(CASE WHEN total_price > 0 THEN total_price ELSE 0 END) as revenue
-                FROM read_parquet('{lake_path}/events/day=*/**/*.parquet')
-                WHERE day IS NOT NULL AND advertiser_id IS NOT NULL AND minute IS NOT NULL
-                GROUP BY DATE_TRUNC('hour', CAST(day || ' ' || LPAD(CAST(minute AS VARCHAR), 2, '0') || ':00:00' AS TIMESTAMP)), day, advertiser_id
-                ORDER BY hour, advertiser_id
+                    impressions,
+                    clicks,
+                    serves,
+                    total_events,
+                    revenue
+                FROM lake_rollup
+                WHERE grouping_set = 'hour_advertiser_id'
+                  AND day IS NOT NULL AND advertiser_id IS NOT NULL AND hour IS NOT NULL
                 """,
                 "format": "partitioned",
                 "partition_by": ["day"]
+            },
+            # Second-tier rollups built from the daily MVs above (must come after them)
+            {
+                "name": "mv_country_total",
+                "sql": """
+                SELECT 
+                    country,
+                    SUM("SUM(bid_price)") as total_revenue,  -- Impression bid revenue
+                    SUM("COUNT(*)")::BIGINT as events
+                FROM read_parquet('{mv_path}/mv_day_country_wide/**/*.parquet')
+                GROUP BY ALL
+                ORDER BY total_revenue DESC
+                """,
+                "depends_on": "mv_day_country_wide",
+                "format": "single_file",
+                "row_group_size": 4096
+            },
+            {
+                "name": "mv_advertiser_total",
+                "sql": """
+                SELECT 
+                    advertiser_id,
+                    SUM("COUNT(*)")::BIGINT as total_events,
+                    SUM("SUM(bid_price)") as revenue  -- Impression bid revenue
+                FROM read_parquet('{mv_path}/mv_day_advertiser_id_wide/**/*.parquet')
+                GROUP BY ALL
+                ORDER BY total_events DESC
+                """,
+                "depends_on": "mv_day_advertiser_id_wide",
+                "format": "single_file",
+                "row_group_size": 4096
+            },
+            {
+                "name": "mv_type_total",
+                "sql": """
+                SELECT 
+                    type,
+                    SUM(revenue) as total_revenue,
+                    SUM(total_events) as total_events,
+                    AVG(revenue) as avg_revenue
+                FROM read_parquet('{mv_path}/mv_day_type_wide/**/*.parquet')
+                GROUP BY ALL
+                ORDER BY total_revenue DESC
+                """,
+                "depends_on": "mv_day_type_wide",
+                "format": "single_file",
+                "row_group_size": 4096
             }
         ]
         
-    def rebuild_mv(self, mv_def: Dict[str, Any]) -> Dict[str, Any]:
-        """Rebuild a single materialized view."""
+    def get_lake_rollup_sql(self) -> str:
+        """Single lake scan shared by the MVs that only need additive aggregates.
+        
+        mv_lake_count, mv_day_advertiser_id_wide and mv_hour_advertiser_id_wide are
+        read back from this table by grouping_set. MVs with COUNT(DISTINCT ...)
+        keep their own scans: under GROUPING SETS every distinct aggregate would be
+        computed for every set, which costs more than the scans it saves.
+        """
+        return """
+        CREATE OR REPLACE TABLE lake_rollup AS
+        SELECT 
+            CASE GROUPING(advertiser_id, country, hour)
+                WHEN 3 THEN 'day_advertiser_id'
+                WHEN 5 THEN 'day_country'
+                WHEN 2 THEN 'hour_advertiser_id'
+            END as grouping_set,
+            day,
+            advertiser_id,
+            country,
+            hour,  -- Lake column, DATE_TRUNC('hour', ts); minute is a 'YYYY-MM-DD HH:MM' string
+            COUNT(*) as total_events,
+            COUNT(*) FILTER (WHERE type = 'impression') as impressions,
+            COUNT(*) FILTER (WHERE type = 'click') as clicks,
+            COUNT(*) FILTER (WHERE type = 'serve') as serves,
+            COUNT(*) FILTER (WHERE type = 'purchase') as purchases,
+            COALESCE(SUM(total_price) FILTER (WHERE total_price > 0), 0) as revenue,
+            SUM(bid_price) FILTER (WHERE type = 'impression') as sum_bid_impr
+        FROM events
+        GROUP BY GROUPING SETS ((day, advertiser_id), (day, country), (hour, day, advertiser_id))
+        """
+        
+    def _prepare_template(self, sql: str) -> str:
+        """Apply the path-independent rewrites to an MV SQL template."""
+        # Normalize aliases for consistency
+        sql = self.normalizer.normalize_aliases(sql)
+        
+        # HLL keeps bounded state per group instead of a hash set of every value
+        if self.approx_distinct:
+            sql = _COUNT_DISTINCT_RE.sub(r"approx_count_distinct(\1)", sql)
+        return sql
+        
+    def _render_sql(self, mv_def: Dict[str, Any]) -> str:
+        """Final SQL for a prepared MV definition: substitute the actual paths."""
+        return mv_def["sql"].format(lake_path=self.lake_path, mv_path=self.mv_path)
+        
+    def _lake_fingerprint(self) -> str:
+        """Newest mtime, file count and total size of the lake's Parquet files."""
+        newest = count = size = 0
+        pending = [os.path.join(self.lake_path, "events")]
+        while pending:
+            with os.scandir(pending.pop()) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        pending.append(entry.path)
+                    elif entry.name.endswith(".parquet"):
+                        stat = entry.stat()
+                        newest = max(newest, stat.st_mtime_ns)
+                        count += 1
+                        size += stat.st_size
+        return f"{newest}-{count}-{size}"
+        
+    def _mv_fingerprint(self, mv_def: Dict[str, Any], sql: str) -> str:
+        """Fingerprint of everything an MV's output depends on."""
+        # Rollups read another MV, so they change whenever that MV is rebuilt
+        upstream = ""
+        if "depends_on" in mv_def:
+            upstream_file = Path(self.mv_path) / mv_def["depends_on"] / _FINGERPRINT_FILE
+            upstream = upstream_file.read_text() if upstream_file.is_file() else ""
+        # MVs read back from the shared GROUPING SETS scan change whenever that scan does
+        if "lake_rollup" in sql:
+            upstream += self.get_lake_rollup_sql()
+        layout = (mv_def["format"], mv_def.get("partition_by"),
+                  mv_def.get("row_group_size", self.row_group_size), self.compression)
+        key = f"{self.lake_fingerprint}|{upstream}|{layout}|{sql}"
+        return hashlib.blake2b(key.encode(), digest_size=16).hexdigest()
+        
+    def _stored_record_count(self, mv_def: Dict[str, Any], fingerprint: str) -> Optional[int]:
+        """Record count of the existing MV if it was built from the same inputs, else None."""
+        if self.force or self.lake_fingerprint is None:
+            return None
+        try:
+            stored = orjson.loads((Path(self.mv_path) / mv_def["name"] / _FINGERPRINT_FILE).read_bytes())
+        except (OSError, orjson.JSONDecodeError):
+            return None
+        return stored["record_count"] if stored.get("fingerprint") == fingerprint else None
+        
+    def rebuild_mv(self, mv_def: Dict[str, Any], con: duckdb.DuckDBPyConnection = None) -> Dict[str, Any]:
+        """Rebuild a single materialized view on con (the shared connection by default)."""
         mv_name = mv_def["name"]
-        print(f"🔄 Rebuilding {mv_name}...")
         
         start_time = time.time()
-        con = self.setup_connection()
+        con = con or self.con
+        
+        # Write beside the live MV and swap it in only once the COPY succeeds
+        output_path = Path(self.mv_path) / mv_name
+        staging_path = output_path.with_name(f"{mv_name}.new")
         
         try:
-            # Format SQL with actual lake path
-            sql = mv_def["sql"].format(lake_path=self.lake_path)
+            sql = self._render_sql(mv_def)
+            
+            # Skip the COPY when neither the lake nor the definition changed since the last build
+            fingerprint = self._mv_fingerprint(mv_def, sql)
+            stored_count = self._stored_record_count(mv_def, fingerprint)
+            if stored_count is not None:
+                return {
+                    "mv_name": mv_name,
+                    "success": True,
+                    "skipped": True,
+                    "record_count": stored_count,
+                    "duration_sec": round(time.time() - start_time, 2),
+                    "output_path": str(output_path),
+                    "format": mv_def["format"],
+                    "details": f"Up to date with {stored_count:,} records; rebuild skipped"
+                }
+            print(f"🔄 Rebuilding {mv_name}...")
             
-            # Normalize aliases for consistency
-            sql = self.normalizer.normalize_aliases(sql)
+            # Create staging directory, clearing any leftover from an interrupted run
+            shutil.rmtree(staging_path, ignore_errors=True)
+            staging_path.mkdir(parents=True)
             
-            # Create output directory
-            output_path = Path(self.mv_path) / mv_name
-            if output_path.exists():
-                import shutil
-                shutil.rmtree(output_path)
-            output_path.mkdir(parents=True, exist_ok=True)
+            row_group_size = mv_def.get("row_group_size", self.row_group_size)
             
             # Execute rebuild based on format
             if mv_def["format"] == "single_file":
-                # Single parquet file
-                con.execute(f"""
-                COPY ({sql}) TO '{output_path}/{mv_name}.parquet' (
+                # Single parquet file; COPY reports the number of rows it wrote
+                record_count = con.execute(f"""
+                COPY ({sql}) TO '{staging_path}/{mv_name}.parquet' (
                     FORMAT PARQUET,
-                    COMPRESSION ZSTD,
-                    ROW_GROUP_SIZE 131072
+                    COMPRESSION {self.compression},
+                    ROW_GROUP_SIZE {row_group_size}
                 )
-                """)
-                
-                # Get record count
-                record_count = con.execute(f"SELECT COUNT(*) FROM ({sql}) t").fetchone()[0]
+                """).fetchone()[0]
                 
             else:
                 # Partitioned format
                 partition_cols = mv_def.get("partition_by", ["day"])
                 partition_str = ", ".join(partition_cols)
                 
-                con.execute(f"""
-                COPY ({sql}) TO '{output_path}' (
+                record_count = con.execute(f"""
+                COPY ({sql}) TO '{staging_path}' (
                     FORMAT PARQUET,
                     PARTITION_BY ({partition_str}),
-                    COMPRESSION ZSTD,
-                    ROW_GROUP_SIZE 131072
+                    COMPRESSION {self.compression},
+                    ROW_GROUP_SIZE {row_group_size}
                 )
-                """)
+                """).fetchone()[0]
                 
-                # Get record count  
-                record_count = con.execute(f"SELECT COUNT(*) FROM ({sql}) t").fetchone()[0]
+            (staging_path / _FINGERPRINT_FILE).write_bytes(
+                orjson.dumps({"fingerprint": fingerprint, "record_count": record_count}))
+            
+            # Promote the staged MV; the previous one stays readable until now
+            shutil.rmtree(output_path, ignore_errors=True)
+            os.replace(staging_path, output_path)
                 
             duration = time.time() - start_time
             
             return {
                 "mv_name": mv_name,
                 "success": True,
+                "skipped": False,
                 "record_count": record_count,
                 "duration_sec": round(duration, 2),
                 "output_path": str(output_path),
@@ -207,18 +412,37 @@ class MVRebuilder:
             }
             
         except Exception as e:
+            shutil.rmtree(staging_path, ignore_errors=True)
             duration = time.time() - start_time
             return {
                 "mv_name": mv_name,
                 "success": False,
+                "skipped": False,
                 "record_count": 0,
                 "duration_sec": round(duration, 2),
                 "output_path": str(output_path),
                 "format": mv_def["format"],
                 "details": f"Failed: {str(e)}"
             }
+            
+    def _rebuild_on_cursor(self, mv_def: Dict[str, Any]) -> Dict[str, Any]:
+        """Rebuild one MV on its own cursor of the shared database."""
+        cur = self.con.cursor()
+        try:
+            return self.rebuild_mv(mv_def, cur)
         finally:
-            con.close()
+            cur.close()
+            
+    def _rebuild_concurrently(self, mv_definitions: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Overlap independent MV rebuilds; results come back in definition order.
+        
+        Cursors share the catalog and DuckDB's thread pool, so concurrent COPYs
+        split the configured threads rather than oversubscribing the machine.
+        """
+        if not mv_definitions:
+            return []
+        with ThreadPoolExecutor(max_workers=len(mv_definitions)) as pool:
+            return list(pool.map(self._rebuild_on_cursor, mv_definitions))
             
     def rebuild_all_mvs(self) -> Dict[str, Any]:
         """Rebuild all materialized views."""
@@ -227,16 +451,52 @@ class MVRebuilder:
         print(f"   📁 Output: {self.mv_path}")
         print()
         
-        mv_definitions = self.get_mv_definitions()
+        mv_definitions = self.mv_definitions
         
-        for mv_def in mv_definitions:
-            result = self.rebuild_mv(mv_def)
-            self.results.append(result)
+        # One connection for every MV so Parquet metadata and buffer pool state carry over
+        self.con = self.setup_connection()
+        try:
+            try:
+                self.lake_fingerprint = self._lake_fingerprint()
+            except OSError as e:
+                # Unreadable lake: rebuild everything and let each MV report its own failure
+                print(f"   ⚠️  Lake fingerprint unavailable ({e}); rebuilding all MVs")
+                self.lake_fingerprint = None
             
-            if result["success"]:
-                print(f"   ✅ {result['mv_name']}: {result['record_count']:,} records ({result['duration_sec']}s)")
+            # The shared scan is only needed if some MV reading it is out of date
+            rollup_stale = any(
+                self._stored_record_count(d, self._mv_fingerprint(d, self._render_sql(d))) is None
+                for d in mv_definitions if "lake_rollup" in d["sql"]
+            )
+            start_time = time.time()
+            try:
+                if rollup_stale:
+                    self.con.execute(self.get_lake_rollup_sql())
+                    print(f"   ✅ lake_rollup: shared scan ({time.time() - start_time:.2f}s)")
+            except Exception as e:
+                # MVs reading lake_rollup will report their own failures below
+                print(f"   ❌ lake_rollup: Failed: {str(e)}")
+                
+            if self.parallel:
+                # Daily MVs first, then the rollups that read their output
+                first_tier = [d for d in mv_definitions if "depends_on" not in d]
+                second_tier = [d for d in mv_definitions if "depends_on" in d]
+                results = self._rebuild_concurrently(first_tier) + self._rebuild_concurrently(second_tier)
             else:
-                print(f"   ❌ {result['mv_name']}: {result['details']}")
+                results = [self.rebuild_mv(mv_def) for mv_def in mv_definitions]
+                
+            for result in results:
+                self.results.append(result)
+                
+                if result["skipped"]:
+                    print(f"   ⏭️  {result['mv_name']}: up to date ({result['record_count']:,} records)")
+                elif result["success"]:
+                    print(f"   ✅ {result['mv_name']}: {result['record_count']:,} records ({result['duration_sec']}s)")
+                else:
+                    print(f"   ❌ {result['mv_name']}: {result['details']}")
+        finally:
+            self.con.close()
+            self.con = None
                 
         return self.generate_rebuild_report()
         
@@ -254,6 +514,7 @@ class MVRebuilder:
                 "total_mvs": len(self.results),
                 "successful_rebuilds": len(successful_rebuilds),
                 "failed_rebuilds": len(failed_rebuilds),
+                "skipped_rebuilds": sum(1 for r in self.results if r["skipped"]),
                 "success_rate": round(len(successful_rebuilds) / len(self.results) * 100, 1) if self.results else 0,
                 "total_records": total_records,
                 "total_duration_sec": round(total_duration, 2),
@@ -278,8 +539,8 @@ class MVRebuilder:
         
     def export_report(self, report: Dict[str, Any], output_path: str) -> str:
         """Export rebuild report to JSON."""
-        with open(output_path, 'w') as f:
-            json.dump(report, f, indent=2)
+        with open(output_path, 'wb') as f:
+            f.write(orjson.dumps(report, option=orjson.OPT_INDENT_2))
         return output_path
 
 def main():
@@ -290,13 +551,32 @@ def main():
     parser.add_argument("--report", required=True, help="Path to rebuild report")
     parser.add_argument("--threads", type=int, default=4, help="DuckDB thread count")
     parser.add_argument("--mem", default="4GB", help="DuckDB memory limit")
+    parser.add_argument("--approx-distinct", action="store_true",
+                        help="Use approx_count_distinct (HyperLogLog) for distinct-count columns")
+    parser.add_argument("--parallel", action="store_true",
+                        help="Rebuild independent MVs concurrently")
+    parser.add_argument("--row-group-size", type=int, default=1048576,
+                        help="Parquet row group size for MVs without their own setting")
+    parser.add_argument("--compression", default="zstd", choices=["zstd", "snappy", "gzip", "uncompressed"],
+                        help="Parquet compression codec for MV output")
+    parser.add_argument("--tmp-dir", default="/tmp/duckdb_mv.tmp", help="DuckDB spill directory")
+    parser.add_argument("--max-temp-size", default="50GB", help="DuckDB spill size limit")
+    parser.add_argument("--force", action="store_true",
+                        help="Rebuild every MV even if the lake is unchanged since the last build")
     args = parser.parse_args()
     
     rebuilder = MVRebuilder(
         lake_path=args.lake,
         mv_path=args.mvs,
         threads=args.threads,
-        memory=args.mem
+        memory=args.mem,
+        approx_distinct=args.approx_distinct,
+        parallel=args.parallel,
+        row_group_size=args.row_group_size,
+        compression=args.compression,
+        force=args.force,
+        tmp_dir=args.tmp_dir,
+        max_temp_size=args.max_temp_size
     )
     
     # Rebuild all MVs
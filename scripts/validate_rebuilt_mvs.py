@@ -9,11 +9,11 @@ Validates the integrity of rebuilt materialized views by:
 """
 
 import time
-import json
 import argparse
 from typing import Dict, List, Any
 from dataclasses import dataclass
 import duckdb
+import orjson
 from pathlib import Path
 
 @dataclass
@@ -32,6 +32,7 @@ class RebuiltMVValidator:
         self.threads = threads
         self.memory = memory
         self.results: List[ValidationResult] = []
+        self.con = None  # Shared by all validations for the duration of run_all_validations
         
     def setup_connection(self) -> duckdb.DuckDBPyConnection:
         """Create DuckDB connection."""
@@ -39,14 +40,37 @@ class RebuiltMVValidator:
         con.execute(f"PRAGMA threads={self.threads};")
         con.execute(f"SET memory_limit='{self.memory}';")
         con.execute("SET TimeZone='UTC';")
+        # Resolve the lake glob and hive partitions once; every query reads FROM events.
+        # The explicit column list bounds the scan even for SELECT * over the view.
+        con.execute(f"""
+            CREATE VIEW events AS
+            SELECT day, type, advertiser_id
+            FROM read_parquet('{self.lake_path}/events/day=*/**/*.parquet', hive_partitioning=1)
+        """)
         return con
         
+    def get_base_rollup_sql(self) -> str:
+        """One lake scan producing every base aggregate the MV checks compare against."""
+        return """
+        CREATE OR REPLACE TEMP TABLE base_rollup AS
+        SELECT 
+            CASE GROUPING(day) WHEN 0 THEN 'day' ELSE 'advertiser_type' END as grouping_set,
+            day,
+            advertiser_id,
+            type,
+            COUNT(*) as total_events,
+            COUNT(*) FILTER (WHERE type = 'impression') as impressions,
+            COUNT(*) FILTER (WHERE type = 'click') as clicks
+        FROM events
+        GROUP BY GROUPING SETS ((day), (advertiser_id, type))
+        """
+        
     def validate_mv_all_adv_type_counts(self) -> ValidationResult:
         """Validate advertiser-type counts MV."""
         mv_name = "mv_all_adv_type_counts"
         print(f"🔍 Validating {mv_name}...")
         
-        con = self.setup_connection()
+        con = self.con
         try:
             # Check MV record count and sample data
             mv_count = con.execute(f"SELECT COUNT(*) FROM read_parquet('{self.mvs_path}/{mv_name}/*.parquet')").fetchone()[0]
@@ -55,10 +79,10 @@ class RebuiltMVValidator:
                 return ValidationResult(mv_name, "ERROR", 0, {}, {}, "MV is empty")
                 
             # Compare with base data aggregation
-            base_count = con.execute(f"""
-                SELECT COUNT(DISTINCT advertiser_id || '-' || type) 
-                FROM read_parquet('{self.lake_path}/events/day=*/**/*.parquet')
-                WHERE advertiser_id IS NOT NULL AND type IS NOT NULL
+            base_count = con.execute("""
+                SELECT COUNT(*) 
+                FROM base_rollup
+                WHERE grouping_set = 'advertiser_type'
             """).fetchone()[0]
             
             # Sample comparison - check total events for a few advertiser-type combinations  
@@ -69,12 +93,9 @@ class RebuiltMVValidator:
                 ORDER BY total_events DESC LIMIT 5
             ),
             base_sample AS (
-                SELECT 
-                    advertiser_id, type, 
-                    COUNT(*) as total_events
-                FROM read_parquet('{self.lake_path}/events/day=*/**/*.parquet')
-                WHERE advertiser_id IS NOT NULL AND type IS NOT NULL
-                GROUP BY advertiser_id, type
+                SELECT advertiser_id, type, total_events
+                FROM base_rollup
+                WHERE grouping_set = 'advertiser_type'
                 ORDER BY total_events DESC LIMIT 5
             )
             SELECT 
@@ -111,18 +132,17 @@ class RebuiltMVValidator:
             
         except Exception as e:
             return ValidationResult(mv_name, "ERROR", 0, {}, {}, f"Validation error: {str(e)}")
-        finally:
-            con.close()
             
     def validate_mv_day_wide_tables(self, mv_name: str) -> ValidationResult:
         """Validate day-partitioned wide table MVs."""
         print(f"🔍 Validating {mv_name}...")
         
-        con = self.setup_connection()
+        con = self.con
         try:
             # Check MV exists and has data
-            mv_files = list(Path(f"{self.mvs_path}/{mv_name}").rglob("*.parquet"))
-            if not mv_files:
+            # Any one file is enough; stop at the first match instead of listing them all
+            first_file = next(Path(f"{self.mvs_path}/{mv_name}").rglob("*.parquet"), None)
+            if first_file is None:
                 return ValidationResult(mv_name, "ERROR", 0, {}, {}, "No MV files found")
                 
             mv_count = con.execute(f"SELECT COUNT(*) FROM read_parquet('{self.mvs_path}/{mv_name}/**/*.parquet')").fetchone()[0]
@@ -146,13 +166,9 @@ class RebuiltMVValidator:
                     ORDER BY day LIMIT 10
                 ),
                 base_agg AS (
-                    SELECT 
-                        day,
-                        SUM(CASE WHEN type = 'impression' THEN 1 ELSE 0 END) as base_impressions,
-                        SUM(CASE WHEN type = 'click' THEN 1 ELSE 0 END) as base_clicks
-                    FROM read_parquet('{self.lake_path}/events/day=*/**/*.parquet')
-                    WHERE advertiser_id IS NOT NULL
-                    GROUP BY day
+                    SELECT day, impressions as base_impressions, clicks as base_clicks
+                    FROM base_rollup
+                    WHERE grouping_set = 'day'
                     ORDER BY day LIMIT 10  
                 )
                 SELECT 
@@ -194,8 +210,6 @@ class RebuiltMVValidator:
             
         except Exception as e:
             return ValidationResult(mv_name, "ERROR", 0, {}, {}, f"Validation error: {str(e)}")
-        finally:
-            con.close()
             
     def run_all_validations(self) -> Dict[str, Any]:
         """Run validation for all rebuilt MVs."""
@@ -204,20 +218,32 @@ class RebuiltMVValidator:
         print(f"   📊 MVs: {self.mvs_path}")
         print()
         
-        # Validate specific MVs
-        result1 = self.validate_mv_all_adv_type_counts()
-        self.results.append(result1)
-        
-        mv_wide_tables = [
-            "mv_day_advertiser_id_wide",
-            "mv_day_country_wide", 
-            "mv_day_type_wide",
-            "mv_hour_advertiser_id_wide"
-        ]
-        
-        for mv_name in mv_wide_tables:
-            result = self.validate_mv_day_wide_tables(mv_name)
-            self.results.append(result)
+        # One connection for every check so Parquet metadata carries over between MVs
+        self.con = self.setup_connection()
+        try:
+            try:
+                self.con.execute(self.get_base_rollup_sql())
+            except Exception as e:
+                # Each validation below reports its own error against the missing base_rollup
+                print(f"   ❌ base_rollup: Failed: {str(e)}")
+                
+            # Validate specific MVs
+            result1 = self.validate_mv_all_adv_type_counts()
+            self.results.append(result1)
+            
+            mv_wide_tables = [
+                "mv_day_advertiser_id_wide",
+                "mv_day_country_wide", 
+                "mv_day_type_wide",
+                "mv_hour_advertiser_id_wide"
+            ]
+            
+            for mv_name in mv_wide_tables:
+                result = self.validate_mv_day_wide_tables(mv_name)
+                self.results.append(result)
+        finally:
+            self.con.close()
+            self.con = None
             
         # Print results
         for result in self.results:
@@ -286,8 +312,8 @@ class RebuiltMVValidator:
         
     def export_report(self, report: Dict[str, Any], output_path: str) -> str:
         """Export validation report."""
-        with open(output_path, 'w') as f:
-            json.dump(report, f, indent=2)
+        with open(output_path, 'wb') as f:
+            f.write(orjson.dumps(report, option=orjson.OPT_INDENT_2))
         return output_path
 
 def main():
@@ -5,67 +5,200 @@ Simple Query Timing Test
 Tests individual queries with detailed timing without complex batch processing.
 """
 
+import argparse
 import json
 import time
 import sys
+import urllib.parse
+import hashlib
+import os
 import duckdb
+import orjson
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 from pathlib import Path
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional, Tuple
 
-def setup_duckdb_connection(memory: str = "12GB"):
+# Views registered once per connection over the day-partitioned MVs
+PARQUET_VIEWS = {
+    "mv_adv": "data/mvs_rebuilt/mv_day_advertiser_id_wide/**/*.parquet",
+    "mv_country": "data/mvs_rebuilt/mv_day_country_wide/**/*.parquet",
+    "mv_type": "data/mvs_rebuilt/mv_day_type_wide/**/*.parquet",
+}
+
+# MV chosen for a query, by the first of these key columns it groups or filters on
+MV_INDEX = {
+    "advertiser_id": "mv_adv",
+    "country": "mv_country",
+    "type": "mv_type",
+}
+LAKE_VIEW = "lake"
+
+# Exact rewrites of raw-event aggregates onto each MV's measure columns. An MV holds one row per
+# (day, key), so COUNT(*) over it counts groups, not events; aggregates without an entry here
+# keep the query on the lake
+MV_MEASURES = {
+    "mv_adv": {("COUNT", "*"): 'SUM("COUNT(*)")::BIGINT'},
+    "mv_country": {("COUNT", "*"): 'SUM("COUNT(*)")::BIGINT'},
+    "mv_type": {("COUNT", "*"): "SUM(total_events)::BIGINT"},
+}
+# MVs built with `key IS NOT NULL`: routed only when a WHERE clause on the key drops NULLs as well
+MV_NULL_FREE_KEYS = {"mv_adv", "mv_country"}
+
+# The lake is only read when no MV can answer a query, over just the day partitions it can match
+LAKE_DIR = Path("data/lake/events")
+LAKE_GLOB = f"{LAKE_DIR}/day=*/**/*.parquet"
+
+# Columns never NULL in data/lake/events, so COUNT(col) on them equals COUNT(*). Only day qualifies:
+# src/prepare.py drops rows without a timestamp, but TRY_CASTs advertiser_id/publisher_id to NULL
+# and the lake is not rewritten by data_quality_repair
+NON_NULL_COLS = {"day"}
+
+# Query files run on this many worker processes, which split the threads and memory budget
+WORKERS = 4
+TOTAL_THREADS = 8
+TOTAL_MEMORY_GB = 12
+
+# Parsed query files are consolidated into one file per queries dir, rebuilt whenever a query file is newer.
+# It lives outside the queries dir, which other runners glob for *.json.
+QUERY_CACHE_DIR = Path("reports/_cache")
+
+def _sql_literal(val: Any) -> str:
+    """Render a bound value as a SQL literal for EXECUTE, which takes no ? parameters."""
+    if isinstance(val, (int, float)) and not isinstance(val, bool):
+        return repr(val)
+    return "'" + str(val).replace("'", "''") + "'"
+
+def _quote_ident(ident: str) -> str:
+    """Quote a column name from the query JSON so reserved words and odd characters bind as-is."""
+    return '"' + ident.replace('"', '""') + '"'
+
+def setup_duckdb_connection(memory: str = "12GB", threads: int = 8, quiet: bool = False):
     """Setup DuckDB connection with proper configuration."""
     con = duckdb.connect(":memory:")
     con.execute(f"SET memory_limit='{memory}';")
-    con.execute("SET threads=8;")
+    con.execute(f"SET threads={threads};")
+    con.execute("SET enable_object_cache=true;")  # Reuse Parquet footers across queries
+    con.execute("SET preserve_insertion_order=false;")
+    # Resolve each glob and read its footers once instead of on every timed query
+    for view, glob in PARQUET_VIEWS.items():
+        try:
+            con.execute(f"CREATE OR REPLACE VIEW {view} AS SELECT * FROM read_parquet('{glob}', hive_partitioning=1)")
+            # COUNT(*) is answered from the footers, so every file's metadata is cached before timing
+            # starts; LIMIT 0 would stop after the first file's schema
+            con.execute(f"SELECT COUNT(*) FROM {view}").fetchone()
+        except duckdb.IOException:
+            if not quiet:
+                print(f"⚠️  {view}: no files match {glob}; queries routed to it fall back to the lake")
     return con
 
-def execute_query_with_timing(con: duckdb.DuckDBPyConnection, query: Dict[str, Any], query_name: str) -> Dict[str, Any]:
-    """Execute a single query with timing."""
-    
-    print(f"🔍 Testing {query_name}")
-    
-    # Simple SQL builder for basic queries
-    select_parts = []
+def _lake_source(query: Dict[str, Any]) -> str:
+    """read_parquet over the lake partitions left after the query's day filters."""
+    files = _sql_literal(LAKE_GLOB)
+    day_clauses = [c for c in query.get("where", []) if c["col"] == "day" and c["op"] in ("eq", "in", "between")]
+    if day_clauses and LAKE_DIR.is_dir():
+        # Directory name -> ISO date; TIMESTAMPTZ days are written URL-encoded, decoded as in src/manifest.py
+        days = {e.name: urllib.parse.unquote(e.name[len("day="):])[:10]
+                for e in os.scandir(LAKE_DIR) if e.name.startswith("day=")}
+        for clause in day_clauses:
+            val = clause["val"]
+            if clause["op"] == "eq":
+                days = {name: d for name, d in days.items() if d == str(val)}
+            elif clause["op"] == "in":
+                wanted = {str(v) for v in val}
+                days = {name: d for name, d in days.items() if d in wanted}
+            else:
+                # ISO dates order the same as strings
+                days = {name: d for name, d in days.items() if str(val[0]) <= d <= str(val[1])}
+        # No matching partition: keep the full glob and let the filter return no rows
+        if days:
+            files = "[" + ", ".join(_sql_literal(f"{LAKE_DIR}/{name}/**/*.parquet") for name in sorted(days)) + "]"
+    return f"read_parquet({files}, hive_partitioning=1, union_by_name=true)"
+
+def _select_items(query: Dict[str, Any]) -> List[Tuple[str, str]]:
+    """Select list as (FUNC, col) pairs; plain columns have an empty FUNC."""
+    items = []
     for item in query.get("select", []):
         if isinstance(item, str):
-            select_parts.append(item)
+            items.append(("", item))
         elif isinstance(item, dict):
             for func, col in item.items():
                 if func.upper() in ['SUM', 'COUNT', 'AVG', 'MIN', 'MAX']:
-                    if col == "*":
-                        select_parts.append(f"{func.upper()}(*)")
-                    else:
-                        select_parts.append(f"{func.upper()}({col})")
+                    if func.upper() == "COUNT" and col in NON_NULL_COLS:
+                        # COUNT(*) skips the per-row NULL check and can be answered from row-group counts
+                        col = "*"
+                    items.append((func.upper(), col))
                     break
+    return items
+
+def _mv_select(query: Dict[str, Any], mv: str) -> Optional[str]:
+    """Select list rewritten onto ``mv``'s measures, or None when the MV cannot answer it exactly."""
+    items = _select_items(query)
+    if not query.get("group_by") and not any(func for func, _ in items):
+        return None  # Raw rows, not an aggregate
+    if mv in MV_NULL_FREE_KEYS:
+        key = next(col for col, view in MV_INDEX.items() if view == mv)
+        if key not in {clause["col"] for clause in query.get("where", [])}:
+            return None  # The lake's NULL-key events are missing from the MV
+    parts = []
+    for func, col in items:
+        if not func:
+            parts.append(_quote_ident(col))
+        elif (func, col) in MV_MEASURES[mv]:
+            parts.append(MV_MEASURES[mv][(func, col)])
+        else:
+            return None
+    return ", ".join(parts)
+
+def _build_clauses(query: Dict[str, Any]) -> Tuple[str, str, str, str, str, List[Any]]:
+    """Build the table-independent clauses of a query once, before any candidate is tried.
+    
+    The select list is the lake's; MVs get their own from ``_mv_select``.
+    """
+    
+    # Simple SQL builder for basic queries
+    select_parts = []
+    for func, col in _select_items(query):
+        if not func:
+            select_parts.append(_quote_ident(col))
+        elif col == "*":
+            select_parts.append(f"{func}(*)")
+        else:
+            select_parts.append(f"{func}({_quote_ident(col)})")
     
     select_sql = ", ".join(select_parts)
     
-    # Build WHERE clause
+    # Build WHERE clause; values are bound as parameters so the SQL text is the same for every table,
+    # keeping their JSON types so numeric columns compare against numbers and keep row-group pruning
     where_parts = []
+    params = []
     for clause in query.get("where", []):
-        col = clause["col"]
+        col = _quote_ident(clause["col"])
         op = clause["op"]
         val = clause["val"]
         
         if op == "eq":
-            where_parts.append(f"{col} = '{val}'")
+            where_parts.append(f"{col} = ?")
+            params.append(val)
         elif op == "in":
-            val_str = "', '".join(str(v) for v in val)
-            where_parts.append(f"{col} IN ('{val_str}')")
+            where_parts.append(f"{col} IN ({', '.join('?' for _ in val)})")
+            params.extend(val)
         elif op == "between":
-            where_parts.append(f"{col} BETWEEN '{val[0]}' AND '{val[1]}'")
+            where_parts.append(f"{col} BETWEEN ? AND ?")
+            params.extend([val[0], val[1]])
         elif op == "neq":
-            where_parts.append(f"{col} != '{val}'")
+            where_parts.append(f"{col} != ?")
+            params.append(val)
     
     where_sql = " AND ".join(where_parts) if where_parts else ""
     
     # Build GROUP BY
-    group_sql = ", ".join(query.get("group_by", []))
+    group_sql = ", ".join(_quote_ident(col) for col in query.get("group_by", []))
     
     # Build ORDER BY
     order_parts = []
     for order in query.get("order_by", []):
-        col = order["col"]
+        col = _quote_ident(order["col"])
         direction = order.get("dir", "asc").upper()
         order_parts.append(f"{col} {direction}")
     order_sql = ", ".join(order_parts)
@@ -73,63 +206,95 @@ def execute_query_with_timing(con: duckdb.DuckDBPyConnection, query: Dict[str, A
     # Build LIMIT
     limit_sql = f"LIMIT {query.get('limit', '')}" if query.get('limit') else ""
     
-    # First try MVs, then fallback to base table
-    tables_to_try = [
-        "data/mvs_rebuilt/mv_day_advertiser_id_wide.parquet",
-        "data/mvs_rebuilt/mv_day_country_wide.parquet", 
-        "data/mvs_rebuilt/mv_day_type_wide.parquet",
-        "data/lake/**/*.parquet"
-    ]
+    return select_sql, where_sql, group_sql, order_sql, limit_sql, params
+
+def execute_query_with_timing(con: duckdb.DuckDBPyConnection, query: Dict[str, Any], query_name: str,
+                              prepared: Dict[str, str], quiet: bool = False) -> Dict[str, Any]:
+    """Execute a single query with timing.
+
+    ``prepared`` maps each SQL shape already planned on ``con`` to its statement
+    name, so queries sharing a shape are planned once and only EXECUTEd after.
+    ``quiet`` drops the per-query progress lines, leaving only the summary.
+    """
+    perf_counter_ns = time.perf_counter_ns
+    log = (lambda *args: None) if quiet else print
+    
+    log(f"🔍 Testing {query_name}")
+    
+    select_sql, where_sql, group_sql, order_sql, limit_sql, params = _build_clauses(query)
     
-    best_result = None
-    best_time = float('inf')
+    # Everything after FROM is the same for every candidate table
+    tail = []
+    if where_sql:
+        tail.append(f"WHERE {where_sql}")
+    if group_sql:
+        tail.append(f"GROUP BY {group_sql}")
+    if order_sql:
+        tail.append(f"ORDER BY {order_sql}")
+    if limit_sql:
+        tail.append(limit_sql)
+    tail_sql = " ".join(tail)
+    
+    # Route to the one MV keyed on a column the query uses, if its measures answer every aggregate;
+    # the lake is only a fallback
+    query_cols = set(query.get("group_by", [])) | {clause["col"] for clause in query.get("where", [])}
+    routed = next((mv for col, mv in MV_INDEX.items() if col in query_cols), None)
+    mv_select_sql = _mv_select(query, routed) if routed else None
+    tables_to_try = [routed, LAKE_VIEW] if mv_select_sql else [LAKE_VIEW]
+    
+    result = None
+    execution_time = 0
     table_used = None
     
+    # Probe candidates by planning them (microseconds); only the first that binds is executed,
+    # so the lake's files are never listed when the routed MV answers the query
+    chosen = None
     for table in tables_to_try:
         try:
-            # Build full query
-            sql_parts = [f"SELECT {select_sql}"]
-            sql_parts.append(f"FROM read_parquet('{table}')")
+            if table == LAKE_VIEW:
+                sql = f"SELECT {select_sql} FROM {_lake_source(query)} {tail_sql}".rstrip()
+            else:
+                sql = f"SELECT {mv_select_sql} FROM {table} {tail_sql}".rstrip()
             
-            if where_sql:
-                sql_parts.append(f"WHERE {where_sql}")
-            if group_sql:
-                sql_parts.append(f"GROUP BY {group_sql}")
-            if order_sql:
-                sql_parts.append(f"ORDER BY {order_sql}")
-            if limit_sql:
-                sql_parts.append(limit_sql)
-                
-            sql = " ".join(sql_parts)
+            name = prepared.get(sql)
+            if name is None:
+                name = "q_" + hashlib.blake2b(sql.encode(), digest_size=8).hexdigest()
+                con.execute(f"PREPARE {name} AS {sql}")
+                prepared[sql] = name
+            chosen = (table, name)
+            break
             
+        except (duckdb.BinderException, duckdb.CatalogException) as e:
+            # MV lacks a referenced column or was not registered; try the next table
+            log(f"   ❌ {table}: Failed - {str(e)[:50]}")
+        except Exception as e:
+            log(f"   ❌ {table}: Failed - {str(e)[:50]}")
+            break
+    
+    if chosen:
+        table, name = chosen
+        try:
             # Time the execution
-            start_time = time.perf_counter()
-            result = con.execute(sql).fetchall()
-            execution_time = (time.perf_counter() - start_time) * 1000
-            
-            if execution_time < best_time:
-                best_time = execution_time
-                best_result = result
-                table_used = table.split('/')[-1] if '/' in table else table
+            args = f"({', '.join(_sql_literal(p) for p in params)})" if params else ""
+            start_ns = perf_counter_ns()
+            # Columnar result; rows are only boxed into Python objects for the 3-row sample
+            result = con.execute(f"EXECUTE {name}{args}").fetch_arrow_table()
+            execution_time = (perf_counter_ns() - start_ns) / 1e6
+            table_used = table
                 
-            print(f"   ⚡ {table_used}: {execution_time:.1f}ms ({len(result)} rows)")
+            log(f"   ⚡ {table_used}: {execution_time:.1f}ms ({result.num_rows} rows)")
             
-            # If this is fast enough, use it
-            if execution_time < 100:  # Under 100ms is good
-                break
-                
         except Exception as e:
-            print(f"   ❌ {table}: Failed - {str(e)[:50]}")
-            continue
+            log(f"   ❌ {table}: Failed - {str(e)[:50]}")
     
-    if best_result is not None:
+    if result is not None:
         return {
             "query_name": query_name,
             "success": True,
-            "execution_time_ms": round(best_time, 2),
+            "execution_time_ms": round(execution_time, 2),
             "table_used": table_used,
-            "row_count": len(best_result),
-            "rows_sample": best_result[:3] if best_result else []
+            "row_count": result.num_rows,
+            "rows_sample": result.slice(0, 3).to_pylist()
         }
     else:
         return {
@@ -141,36 +306,59 @@ def execute_query_with_timing(con: duckdb.DuckDBPyConnection, query: Dict[str, A
             "error": "No table worked"
         }
 
+# Per-process connection and prepared-statement cache, opened by the first query a worker runs
+_worker_con = None
+_worker_prepared: Dict[str, str] = {}
+
+def load_queries(queries_dir: Path) -> List[Dict[str, Any]]:
+    """Load every query in ``queries_dir`` with a ``name`` key, from the consolidated cache when fresh."""
+    dir_key = hashlib.blake2b(str(queries_dir.resolve()).encode(), digest_size=8).hexdigest()
+    cache = QUERY_CACHE_DIR / f"queries_{dir_key}.json"
+    query_files = sorted(queries_dir.glob("*.json"))
+    if cache.exists() and all(p.stat().st_mtime <= cache.stat().st_mtime for p in query_files):
+        queries = orjson.loads(cache.read_bytes())
+        if [q["name"] for q in queries] == [p.stem for p in query_files]:
+            return queries
+    
+    queries = [{"name": p.stem, **orjson.loads(p.read_bytes())} for p in query_files]
+    if queries:
+        cache.parent.mkdir(parents=True, exist_ok=True)
+        cache.write_bytes(orjson.dumps(queries))
+    return queries
+
+def _run_one(query: Dict[str, Any], quiet: bool = False) -> Dict[str, Any]:
+    """Time one query on this worker's own connection."""
+    global _worker_con
+    if _worker_con is None:
+        _worker_con = setup_duckdb_connection(f"{max(1, TOTAL_MEMORY_GB // WORKERS)}GB",
+                                              max(1, TOTAL_THREADS // WORKERS), quiet)
+    result = execute_query_with_timing(_worker_con, query, query["name"], _worker_prepared, quiet)
+    if not quiet:
+        print()
+    return result
+
 def main():
     """Run simple timing tests on consolidated queries."""
+    parser = argparse.ArgumentParser(description="Simple Query Timing Test")
+    parser.add_argument("--quiet", action="store_true", help="Only print the summary, not per-query progress")
+    args = parser.parse_args()
     
     print("🚀 Simple Query Timing Test")
     print("=" * 50)
     
-    # Setup connection
-    con = setup_duckdb_connection("12GB")
-    print("✅ DuckDB connection established")
-    
     # Load queries
-    queries_dir = Path("queries/consolidated_individual")
-    query_files = sorted(queries_dir.glob("*.json"))
+    queries = load_queries(Path("queries/consolidated_individual"))
     
-    if not query_files:
+    if not queries:
         print("❌ No query files found")
         return
         
-    print(f"📋 Found {len(query_files)} query files")
+    print(f"📋 Found {len(queries)} queries, {WORKERS} workers")
     print()
     
-    results = []
-    
-    for query_file in query_files:
-        with open(query_file, 'r') as f:
-            query = json.load(f)
-        
-        result = execute_query_with_timing(con, query, query_file.stem)
-        results.append(result)
-        print()
+    # Each worker opens its own DuckDB connection; results come back in file order
+    with ProcessPoolExecutor(max_workers=WORKERS) as ex:
+        results = list(ex.map(partial(_run_one, quiet=args.quiet), queries))
     
     # Print summary
     successful = [r for r in results if r["success"]]
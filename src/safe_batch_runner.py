@@ -22,6 +22,7 @@ from dataclasses import dataclass
 from concurrent.futures import ThreadPoolExecutor, as_completed
 import duckdb
 import orjson
+import pyarrow as pa
 
 # Memory and safety limits
 MAX_BATCH_SIZE = 20
@@ -194,6 +195,12 @@ class SafeBatchRunner:
         self.mv_build_locks = {}
         self.mv_build_lock_manager = threading.Lock()
         
+        # Reused by execute_single_query so per-query calls skip connection setup;
+        # each calling thread gets its own cursor on this shared session
+        self._session_connection: Optional[duckdb.DuckDBPyConnection] = None
+        self._session_lock = threading.Lock()
+        self._session_cursors = threading.local()
+        
     def get_mv_build_lock(self, mv_name: str) -> threading.Lock:
         """Get or create build lock for MV."""
         with self.mv_build_lock_manager:
@@ -201,9 +208,8 @@ class SafeBatchRunner:
                 self.mv_build_locks[mv_name] = threading.Lock()
             return self.mv_build_locks[mv_name]
             
-    def execute_query_in_memory(self, query: Dict[str, Any], query_id: str, 
-                               connection: duckdb.DuckDBPyConnection) -> QueryResult:
-        """Execute single query and buffer result in memory (no I/O in timing)."""
+    def build_query_sql(self, query: Dict[str, Any]) -> Tuple[str, str]:
+        """Plan a JSON query and return (table, sql) against the chosen source."""
         
         # Build SQL (using existing logic from runner.py)
         from runner import choose_plan, build_select, build_where, build_order_by
@@ -227,6 +233,21 @@ class SafeBatchRunner:
                 from_clause = f"read_parquet('{mv_path}.parquet')"
                 
         sql = f"SELECT {select_sql} FROM {from_clause} {where_sql} {group_sql} {order_sql} {limit_sql}".strip()
+        return table, sql
+        
+    @staticmethod
+    def format_csv(columns: List[str], rows: List[tuple]) -> str:
+        """Render fetched rows as quoted CSV text."""
+        csv_lines = [','.join(f'"{col}"' for col in columns)]  # Header
+        for row in rows:
+            csv_lines.append(','.join(f'"{str(val)}"' for val in row))
+        return '\n'.join(csv_lines)
+        
+    def execute_query_in_memory(self, query: Dict[str, Any], query_id: str, 
+                               connection: duckdb.DuckDBPyConnection) -> QueryResult:
+        """Execute single query and buffer result in memory (no I/O in timing)."""
+        
+        _, sql = self.build_query_sql(query)
         
         # Execute with timing (pure compute, no I/O)
         start_time = time.perf_counter()
@@ -240,10 +261,7 @@ class SafeBatchRunner:
             
             # Convert to CSV format in memory
             if result and columns:
-                csv_lines = [','.join(f'"{col}"' for col in columns)]  # Header
-                for row in result:
-                    csv_lines.append(','.join(f'"{str(val)}"' for val in row))
-                csv_content = '\\n'.join(csv_lines)
+                csv_content = self.format_csv(columns, result)
                 
                 # Estimate memory usage
                 memory_mb = len(csv_content) / (1024 * 1024)
@@ -270,6 +288,106 @@ class SafeBatchRunner:
             compute_time_ms = (time.perf_counter() - start_time) * 1000
             raise Exception(f"Query execution failed: {str(e)}")
             
+    def get_session_connection(self) -> duckdb.DuckDBPyConnection:
+        """Read connection kept open across execute_single_query calls."""
+        with self._session_lock:
+            if self._session_connection is None:
+                self._session_connection = self.connection_pool.get_read_connection()
+            return self._session_connection
+            
+    def get_session_cursor(self) -> duckdb.DuckDBPyConnection:
+        """Per-thread cursor on the session connection (shares its catalog and caches)."""
+        cursor = getattr(self._session_cursors, "cursor", None)
+        if cursor is None:
+            cursor = self.get_session_connection().cursor()
+            self._session_cursors.cursor = cursor
+            # PREPAREd statement names by SQL text; prepared statements are per-cursor
+            self._session_cursors.prepared = {}
+        return cursor
+        
+    def close(self):
+        """Close the persistent session connection, if one was opened."""
+        with self._session_lock:
+            if self._session_connection is not None:
+                # Closing the parent invalidates every thread's cursor
+                self._session_connection.close()
+                self._session_connection = None
+                self._session_cursors = threading.local()
+            
+    def clear_cache(self, drop_os_cache: bool = False):
+        """Discard warm state before a cold-timed run.
+        
+        Closing the in-memory session drops DuckDB's buffer pool and Parquet
+        object cache. With drop_os_cache (Linux, root only) the kernel page
+        cache is flushed too, so the next query reads from disk.
+        """
+        self.close()
+        if drop_os_cache and sys.platform.startswith("linux") and os.geteuid() == 0:
+            os.sync()
+            with open("/proc/sys/vm/drop_caches", "w") as f:
+                f.write("3\n")
+            
+    def execute_single_query(self, query: Dict[str, Any], output_name: Optional[str] = None,
+                             return_rows: bool = True) -> Dict[str, Any]:
+        """Execute one query on the session connection.
+        
+        When output_name is given the result is staged and promoted to ready/,
+        as an Arrow IPC file streamed batch by batch if the name ends in
+        ".arrow" (rows are then not returned) and as CSV otherwise; with None
+        no file is written (timing-only callers). With
+        return_rows=False and no output file, rows are only counted from Arrow
+        batches and "results" is None.
+        
+        Each distinct SQL text is PREPAREd once per cursor and re-run with
+        EXECUTE; "prepare_ns" is the parse/bind/plan time this call paid
+        (0 when the plan was reused).
+        """
+        table, sql = self.build_query_sql(query)
+        
+        cursor = self.get_session_cursor()
+        prepared = self._session_cursors.prepared
+        statement = prepared.get(sql)
+        prepare_ns = 0
+        if statement is None:
+            statement = f"q{len(prepared)}"
+            prepare_start = time.perf_counter_ns()
+            cursor.execute(f"PREPARE {statement} AS {sql}")
+            prepare_ns = time.perf_counter_ns() - prepare_start
+            prepared[sql] = statement
+            
+        cursor.execute(f"EXECUTE {statement}")
+        columns = [desc[0] for desc in cursor.description] if cursor.description else []
+        
+        if columns and output_name is not None and output_name.endswith(".arrow"):
+            # Stream record batches straight into one IPC file; rows never become Python objects
+            reader = cursor.fetch_record_batch(65536)
+            temp_file = self.staging_manager.create_temp_file(output_name)
+            row_count = 0
+            with pa.OSFile(str(temp_file), 'wb') as sink, pa.ipc.new_file(sink, reader.schema) as writer:
+                for batch in reader:
+                    writer.write_batch(batch)
+                    row_count += batch.num_rows
+            self.staging_manager.atomic_promote(temp_file, output_name)
+            return {"table": table, "columns": columns, "results": None, "row_count": row_count,
+                    "prepare_ns": prepare_ns}
+        
+        if not return_rows and output_name is None:
+            # Count in Arrow record batches without building Python row tuples
+            row_count = sum(batch.num_rows for batch in cursor.fetch_record_batch(65536)) if columns else 0
+            return {"table": table, "columns": columns, "results": None, "row_count": row_count,
+                    "prepare_ns": prepare_ns}
+        
+        rows = cursor.fetchall()
+        
+        if output_name is not None:
+            temp_file = self.staging_manager.create_temp_file(output_name)
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                f.write(self.format_csv(columns, rows) if columns else "")
+            self.staging_manager.atomic_promote(temp_file, output_name)
+        
+        return {"table": table, "columns": columns, "results": rows, "row_count": len(rows),
+                "prepare_ns": prepare_ns}
+        
     def execute_batch_safe(self, queries: List[Dict[str, Any]], batch_id: str) -> BatchResult:
         """Execute batch with safety guards and memory-only timing."""
         
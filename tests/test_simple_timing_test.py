@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Tests for MV routing and lake partition pruning in simple_timing_test.
+
+Run from the repo root with: python -m unittest discover -s tests
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import duckdb
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import simple_timing_test  # noqa: E402
+
+# Partition names as src/prepare.py writes them from a TIMESTAMPTZ day on duckdb 1.1.0
+ENCODED = {
+    "2024-12-30": "day=2024-12-30%2000%3A00%3A00%2B00",
+    "2024-12-31": "day=2024-12-31%2000%3A00%3A00%2B00",
+    "2025-01-01": "day=2025-01-01%2000%3A00%3A00%2B00",
+}
+
+
+class LakeSourceTest(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.lake_dir = Path(tmp.name) / "events"
+        for day, name in ENCODED.items():
+            part = self.lake_dir / name
+            part.mkdir(parents=True)
+            duckdb.sql(f"COPY (SELECT 1 AS events FROM range(3)) TO '{part / 'data_0.parquet'}' (FORMAT PARQUET)")
+        patcher = mock.patch.object(simple_timing_test, "LAKE_DIR", self.lake_dir)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def source(self, *where):
+        return simple_timing_test._lake_source({"where": list(where)})
+
+    def test_between_keeps_encoded_end_day(self):
+        src = self.source({"col": "day", "op": "between", "val": ["2024-10-01", "2024-12-31"]})
+        self.assertIn(ENCODED["2024-12-30"], src)
+        self.assertIn(ENCODED["2024-12-31"], src)
+        self.assertNotIn(ENCODED["2025-01-01"], src)
+
+    def test_eq_and_in_match_encoded_names(self):
+        src = self.source({"col": "day", "op": "eq", "val": "2024-12-31"})
+        self.assertIn(ENCODED["2024-12-31"], src)
+        self.assertNotIn(ENCODED["2024-12-30"], src)
+
+        src = self.source({"col": "day", "op": "in", "val": ["2024-12-30", "2025-01-01"]})
+        self.assertIn(ENCODED["2024-12-30"], src)
+        self.assertIn(ENCODED["2025-01-01"], src)
+        self.assertNotIn(ENCODED["2024-12-31"], src)
+
+    def test_no_match_falls_back_to_full_glob(self):
+        src = self.source({"col": "day", "op": "eq", "val": "2023-01-01"})
+        self.assertIn("day=*", src)
+
+    def test_pruned_source_reads_encoded_paths(self):
+        src = self.source({"col": "day", "op": "between", "val": ["2024-12-30", "2024-12-31"]})
+        self.assertEqual(duckdb.sql(f"SELECT SUM(events) FROM {src}").fetchone()[0], 6)
+
+
+# Queries the router may send to an MV; each returns at most 3 rows so the sample holds all of them
+ROUTED_QUERIES = [
+    ("mv_type", {"select": ["type", {"COUNT": "*"}], "where": [{"col": "type", "op": "eq", "val": "click"}],
+                 "group_by": ["type"]}),
+    ("mv_adv", {"select": ["day", {"COUNT": "*"}], "where": [{"col": "advertiser_id", "op": "eq", "val": 1}],
+                "group_by": ["day"], "order_by": [{"col": "day"}]}),
+    ("mv_country", {"select": [{"COUNT": "day"}], "where": [{"col": "country", "op": "in", "val": ["US", "DE"]}]}),
+    # No country filter: the MV lacks the NULL-country events
+    ("lake", {"select": ["country", {"COUNT": "*"}], "group_by": ["country"], "order_by": [{"col": "country"}]}),
+    # No MV measure for SUM(advertiser_id)
+    ("lake", {"select": ["type", {"SUM": "advertiser_id"}], "group_by": ["type"], "order_by": [{"col": "type"}]}),
+]
+
+
+class RoutingTest(unittest.TestCase):
+    """Routed queries must return what the same query returns on the lake."""
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        cwd = os.getcwd()
+        os.chdir(tmp.name)
+        self.addCleanup(os.chdir, cwd)
+
+        self.db = duckdb.connect()
+        self.addCleanup(self.db.close)
+        self.db.execute("""
+            CREATE TABLE events AS
+            SELECT DATE '2024-01-01' + (i % 3)::INTEGER AS day,
+                   CASE WHEN i % 4 = 0 THEN 'click' ELSE 'impression' END AS type,
+                   CASE WHEN i % 10 = 0 THEN NULL ELSE i % 5 END AS advertiser_id,
+                   CASE WHEN i % 7 = 0 THEN NULL WHEN i % 2 = 0 THEN 'US' ELSE 'DE' END AS country
+            FROM range(300) t(i)
+        """)
+        for parent in ("data/lake", "data/mvs_rebuilt"):
+            Path(parent).mkdir(parents=True)
+        copies = {
+            "data/lake/events": "SELECT * FROM events",
+            "data/mvs_rebuilt/mv_day_type_wide": "SELECT day, type, COUNT(*) AS total_events FROM events GROUP BY ALL",
+            "data/mvs_rebuilt/mv_day_advertiser_id_wide": """
+                SELECT day, advertiser_id, COUNT(*) AS "COUNT(*)" FROM events
+                WHERE advertiser_id IS NOT NULL GROUP BY ALL""",
+            "data/mvs_rebuilt/mv_day_country_wide": """
+                SELECT day, country, COUNT(*) AS "COUNT(*)" FROM events
+                WHERE country IS NOT NULL GROUP BY ALL""",
+        }
+        for path, sql in copies.items():
+            self.db.execute(f"COPY ({sql}) TO '{path}' (FORMAT PARQUET, PARTITION_BY (day))")
+        self.con = simple_timing_test.setup_duckdb_connection("1GB", 1, quiet=True)
+        self.addCleanup(self.con.close)
+
+    def lake_rows(self, query):
+        select_sql, where_sql, group_sql, order_sql, _, params = simple_timing_test._build_clauses(query)
+        sql = f"SELECT {select_sql} FROM events"
+        if where_sql:
+            sql += f" WHERE {where_sql}"
+        if group_sql:
+            sql += f" GROUP BY {group_sql}"
+        if order_sql:
+            sql += f" ORDER BY {order_sql}"
+        return self.db.execute(sql, params).fetchall()
+
+    def test_routed_results_match_lake(self):
+        for table, query in ROUTED_QUERIES:
+            with self.subTest(query=query):
+                result = simple_timing_test.execute_query_with_timing(self.con, query, "q", {}, quiet=True)
+                self.assertTrue(result["success"])
+                self.assertEqual(result["table_used"], table)
+                rows = [tuple(row.values()) for row in result["rows_sample"]]
+                self.assertEqual(rows, self.lake_rows(query))
+
+
+if __name__ == "__main__":
+    unittest.main()